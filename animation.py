@@ -1,29 +1,19 @@
-import pygame
+import pygame, assetpack, imagecache
 
-class Animation(object):
-	loadedImagePaths = []
-	loadedImages = []
+cache = imagecache.ImageCache(48 * 1024 * 1024)
 
-	def __init__(self, imgPath, width, height, updateRate, frameLimit):
-		if imgPath not in Animation.loadedImagePaths:
-			self.img = pygame.image.load(imgPath).convert_alpha()
-			Animation.loadedImagePaths.append(imgPath)
-			Animation.loadedImages.append(self.img)
-		else:
-			self.img = Animation.loadedImages[Animation.loadedImagePaths.index(imgPath)]
+class Template(object):
+	characters = {}
 
+	def __init__(self, imgPath, width, height, updateRate, frameLimit):
+		self.path = imgPath
+		self.img = cache.load(imgPath)
 		self.width = width
 		self.height = height
 		self.frameList = self.genLoopable(self.img.get_width(), self.img.get_height())
-		self.position = pygame.rect.Rect((0, 0), (self.width, self.height))
-		self.surface = pygame.Surface(self.position.size, pygame.SRCALPHA | pygame.HWSURFACE).convert_alpha()
+		self.frames = tuple(self.img.subsurface(pygame.rect.Rect((x * width, y * height), (width, height))) for x, y in self.frameList)
 		self.rate = 1 / float(updateRate)
-		self.swapTimer = 0
-		self.frame = 0
 		self.frameLimit = frameLimit
-		self.callback = None
-
-		self.setPos(self.position.topleft)
 
 	def genLoopable(self, width, height):
 		posList = []
@@ -34,13 +24,52 @@ class Animation(object):
 
 		return posList
 
-	def setPos(self, pos):
-		self.position.topleft = (pos[0] * self.width, pos[1] * self.height)
-		self.surface.fill(0)
-		self.surface.blit(self.img, (-self.position.x, -self.position.y))
+def characterTemplates(charType):
+	if charType not in Template.characters:
+		templates = {}
+
+		for anim in assetpack.default.listdir("assets/characters/%s" % charType):
+			info = anim[:anim.find(".")].split("+")
+			if len(info) < 3:
+				info[1:2] = [1, 1]
+
+			templates[info[0]] = Template("assets/characters/%s/%s" % (charType, anim), 50, 50, float(info[1]), int(info[2]))
+
+		Template.characters[charType] = templates
+
+	else:
+		for template in Template.characters[charType].itervalues():
+			cache.load(template.path)
+
+	return Template.characters[charType]
+
+def forgetTemplates(path):
+	for charType, templates in Template.characters.items():
+		if any(template.path == path for template in templates.itervalues()):
+			del Template.characters[charType]
+
+cache.onEvict = forgetTemplates
+
+class Animation(object):
+
+	def __init__(self, template):
+		self.template = None
+		self.timers = {}
+
+		self.play(template)
+
+	def play(self, template, callback = None):
+		#each strip resumes its own partial frame time, as when every strip had its own Animation
+		if self.template:
+			self.timers[self.template] = self.swapTimer
+
+		self.template = template
+		self.swapTimer = self.timers.get(template, 0)
+		self.frame = 0
+		self.callback = callback
 
 	def getSplice(self):
-		return self.surface
+		return self.template.frames[self.frame]
 
 	def setCallback(self, callback):
 		self.callback = callback
@@ -48,14 +77,12 @@ class Animation(object):
 	def update(self, dt):
 		self.swapTimer = self.swapTimer + dt
 
-		if self.swapTimer > self.rate:
-			self.swapTimer -= self.rate
+		if self.swapTimer > self.template.rate:
+			self.swapTimer -= self.template.rate
 			self.frame += 1
 
-			if self.frame == self.frameLimit:
+			if self.frame == self.template.frameLimit:
 				self.frame = 0
 
 				if self.callback:
 					self.callback()
-
-			self.setPos(self.frameList[self.frame])
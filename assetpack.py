@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+
+import pygame, hashlib, io, marshal, os, struct, sys, zlib
+
+magic = "LSAP"
+version = 2
+header = struct.Struct("<4sHQ")
+align = 16
+
+def key(path):
+	return os.path.normpath(path).replace("\\", "/")
+
+def stamp(path):
+	#a content hash, since the updater and plain copies reset mtimes without changing the file
+	with open(path, "rb") as f:
+		return hashlib.md5(f.read()).hexdigest()
+
+class Stamps(object):
+
+	def __init__(self):
+		self.known = {}
+
+	def matches(self, path, digest):
+		#a release only changes through the updater, which replaces the pack and atlas along with everything else
+		if getattr(sys, "frozen", False):
+			return True
+
+		#a file is only hashed again once its stat changes, so edits made during a session are still noticed
+		try:
+			stat = os.stat(path)
+			statKey = (stat.st_mtime, stat.st_size)
+
+			if self.known.get(path, (None, None))[0] != statKey:
+				self.known[path] = (statKey, stamp(path))
+
+		except (IOError, OSError):
+			return True #no loose file to compare against, trust the packed copy
+
+		return self.known[path][1] == digest
+
+stamps = Stamps()
+
+def build(path = "assets.pack", roots = ("assets", "maps"), skip = ()):
+	#png files are stored decoded as zlib compressed RGBA rows, everything else as the raw file bytes
+	entries = {}
+
+	with open(path + ".tmp", "wb") as f:
+		f.write(header.pack(magic, version, 0))
+
+		for root in roots:
+			for dirpath, dirnames, filenames in os.walk(root):
+				for fn in sorted(filenames):
+					name = key(os.path.join(dirpath, fn))
+
+					if name.endswith((".tmx", ".cache", ".tmp")):
+						continue
+
+					if name in skip:
+						#pixels already live in an atlas page, only keep the name so directory listings still see it
+						entries[name] = ("skip", 0, 0, 0, 0, "")
+						continue
+
+					if fn.lower().endswith(".png"):
+						img = pygame.image.load(name)
+						blob = zlib.compress(pygame.image.tostring(img, "RGBA"))
+						entry = ("rgba", img.get_width(), img.get_height())
+
+					else:
+						with open(name, "rb") as src:
+							blob = src.read()
+
+						entry = ("file", 0, 0)
+
+					f.write("\0" * (-f.tell() % align))
+					entries[name] = entry + (f.tell(), len(blob), stamp(name))
+					f.write(blob)
+
+		index = f.tell()
+		f.write(marshal.dumps(entries, 2))
+		f.seek(0)
+		f.write(header.pack(magic, version, index))
+
+	#windows will not replace a file that is still open, so the loaded pack lets go of it until the new one is in place
+	reopen = default.file is not None and os.path.abspath(default.path) == os.path.abspath(path)
+
+	if reopen:
+		default.close()
+
+	if os.path.isfile(path):
+		os.unlink(path)
+
+	os.rename(path + ".tmp", path)
+
+	if reopen:
+		default.load()
+
+	return entries
+
+class Pack(object):
+
+	def __init__(self, path = "assets.pack"):
+		self.path = path
+		self.load()
+
+	def load(self):
+		self.entries = {}
+		self.file = None
+
+		if not os.path.isfile(self.path):
+			return
+
+		f = open(self.path, "rb")
+		fileMagic, fileVersion, index = header.unpack(f.read(header.size))
+
+		if fileMagic != magic or fileVersion != version:
+			f.close()
+			return
+
+		f.seek(index)
+		self.entries = marshal.loads(f.read())
+		self.file = f
+
+	def close(self):
+		if self.file:
+			self.file.close()
+
+		self.entries = {}
+		self.file = None
+
+	def read(self, offset, length):
+		#one handle stays open for every read, so loading an asset costs a seek instead of an open
+		self.file.seek(offset)
+
+		return self.file.read(length)
+
+	def __contains__(self, path):
+		return key(path) in self.entries
+
+	def entry(self, path, kind):
+		entry = self.entries.get(key(path))
+
+		if not entry or entry[0] != kind or not stamps.matches(path, entry[5]):
+			return None #not packed, or the loose file was edited since the pack was built
+
+		return entry
+
+	def image(self, path):
+		entry = self.entry(path, "rgba")
+
+		if not entry:
+			return pygame.image.load(path)
+
+		kind, width, height, offset, length, digest = entry
+
+		return pygame.image.fromstring(zlib.decompress(self.read(offset, length)), (width, height), "RGBA")
+
+	def open(self, path):
+		entry = self.entry(path, "file")
+
+		if not entry:
+			return open(path, "rb")
+
+		kind, width, height, offset, length, digest = entry
+
+		return io.BytesIO(self.read(offset, length))
+
+	def listdir(self, directory):
+		prefix = key(directory) + "/"
+		names = [name[len(prefix):] for name in self.entries if name.startswith(prefix) and "/" not in name[len(prefix):]]
+
+		#loose files added during development are listed next to the packed ones
+		if os.path.isdir(directory):
+			names.extend(os.listdir(directory))
+
+		return sorted(set(names))
+
+default = Pack()
+
+if __name__ == "__main__":
+	import atlas
+
+	atlas.build()
+	print "packed %d files into assets.pack" % len(build(skip = atlas.index()))
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+
+import pygame, assetpack, glob, json, os
+
+sources = ["assets/characters/*/*.png", "assets/sprites/key*.png", "assets/sprites/shadow.png", "assets/sprites/sheet.png"]
+
+def pack(sizes, pageSize):
+	#shelf packing, tallest images first; each shelf is as tall as its first image
+	placed = {}
+	pages = []
+
+	for path, (w, h) in sorted(sizes.items(), key = lambda item: (-item[1][1], -item[1][0], item[0])):
+		if w > pageSize or h > pageSize:
+			raise ValueError("%s does not fit in a %dpx atlas page" % (path, pageSize))
+
+		for page, shelves in enumerate(pages):
+			shelf = next((s for s in shelves if h <= s[1] and s[2] + w <= pageSize), None)
+
+			if shelf is None and shelves[-1][0] + shelves[-1][1] + h <= pageSize:
+				shelf = [shelves[-1][0] + shelves[-1][1], h, 0]
+				shelves.append(shelf)
+
+			if shelf is not None:
+				break
+
+		else:
+			page = len(pages)
+			shelf = [0, h, 0]
+			pages.append([shelf])
+
+		placed[path] = (page, shelf[2], shelf[0], w, h)
+		shelf[2] += w
+
+	return placed, len(pages)
+
+def build(directory = "assets/atlas", pageSize = 2048):
+	paths = sorted(set(assetpack.key(path) for pattern in sources for path in glob.glob(pattern)))
+	images = dict((path, pygame.image.load(path)) for path in paths)
+	placed, count = pack(dict((path, img.get_size()) for path, img in images.iteritems()), pageSize)
+
+	if not os.path.isdir(directory):
+		os.makedirs(directory)
+
+	extents = [(0, 0)] * count
+
+	for page, x, y, w, h in placed.itervalues():
+		extents[page] = (max(extents[page][0], x + w), max(extents[page][1], y + h))
+
+	pages = [pygame.Surface(size, pygame.SRCALPHA, 32) for size in extents]
+	regions = {}
+
+	for path, (page, x, y, w, h) in placed.iteritems():
+		pages[page].blit(images[path], (x, y), special_flags = pygame.BLEND_RGBA_MAX)
+		regions[path] = {"page": page, "rect": [x, y, w, h], "stamp": assetpack.stamp(path)}
+
+	files = []
+
+	for i, surface in enumerate(pages):
+		files.append("atlas%d.png" % i)
+		pygame.image.save(surface, os.path.join(directory, files[-1]))
+
+	with open(os.path.join(directory, "atlas.json"), "w") as f:
+		json.dump({"pages": files, "regions": regions}, f, indent = 1, sort_keys = True)
+
+	return len(regions), count
+
+def index(directory = "assets/atlas"):
+	#straight from disk, a pack that is already loaded may still hold the previous build
+	with open(os.path.join(directory, "atlas.json")) as f:
+		return json.load(f)["regions"]
+
+class Atlas(object):
+
+	def __init__(self, directory = "assets/atlas"):
+		self.directory = directory
+		self.files = []
+		self.regions = {}
+		self.pages = {}
+		self.converted = {}
+
+		index = os.path.join(directory, "atlas.json")
+
+		if index in assetpack.default or os.path.isfile(index):
+			with assetpack.default.open(index) as f:
+				data = json.load(f)
+
+			self.files = data["pages"]
+			self.regions = data["regions"]
+
+	def page(self, index, converted):
+		if index not in self.pages:
+			self.pages[index] = assetpack.default.image(os.path.join(self.directory, self.files[index]))
+
+		if not converted:
+			return self.pages[index]
+
+		#the tile loader picks its own pixel formats from the decoded page, sprites blit from a display format copy
+		if index not in self.converted:
+			self.converted[index] = self.pages[index].convert_alpha()
+
+		return self.converted[index]
+
+	def size(self):
+		return sum(page.get_width() * page.get_height() * page.get_bytesize() for page in self.pages.values() + self.converted.values())
+
+	def region(self, path, converted = True):
+		entry = self.regions.get(assetpack.key(path))
+
+		if not entry:
+			return None
+
+		if not assetpack.stamps.matches(path, entry["stamp"]):
+			return None #edited since the atlas was built, use the loose file
+
+		return self.page(entry["page"], converted).subsurface(pygame.rect.Rect(entry["rect"]))
+
+	def load(self, path):
+		img = self.region(path, False)
+
+		if img is None:
+			img = assetpack.default.image(path)
+
+		return img
+
+default = Atlas()
+
+if __name__ == "__main__":
+	print "packed %d images into %d pages" % build()
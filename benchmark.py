@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+
+import pygame, headless, replay, save, animation, argparse, base64, json, multiprocessing, os, platform
+from timeit import default_timer as clock
+
+try:
+	import resource
+except ImportError:
+	resource = None #not available on windows
+
+def shippedMaps():
+	maps = [("Game", "Tutorial")]
+	maps += [("World 01", m) for m in sorted(os.listdir("maps/World 01"))]
+
+	return maps
+
+def percentiles(samples):
+	if not samples:
+		return None
+
+	samples = sorted(samples)
+	pick = lambda p: samples[min(len(samples) - 1, int(p * len(samples)))] * 1000
+
+	return {
+		"mean": sum(samples) / len(samples) * 1000,
+		"p50": pick(0.5),
+		"p90": pick(0.9),
+		"p99": pick(0.99),
+		"max": samples[-1] * 1000
+	}
+
+def peakMemory():
+	#ru_maxrss only ever grows, so this is only a per-map number in a process that ran nothing else
+	if resource:
+		return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+	return None
+
+def script(ticks):
+	events = [(0, pygame.K_d, True)]
+
+	for tick in xrange(60, ticks, 75):
+		events.append((tick, pygame.K_SPACE, True))
+		events.append((tick + 40, pygame.K_SPACE, False))
+
+	for tick in xrange(360, ticks, 720):
+		events.append((tick, pygame.K_w, True))
+		events.append((tick + 1, pygame.K_w, False))
+		events.append((tick + 360, pygame.K_s, True))
+		events.append((tick + 361, pygame.K_s, False))
+
+	return headless.Script(events)
+
+class Benchmark(object):
+
+	def __init__(self, runner, ticks, ticksPerFrame):
+		self.runner = runner
+		self.ticks = ticks
+		self.ticksPerFrame = ticksPerFrame
+		self.offscreen = pygame.Surface(runner.resolution, 0, 32)
+
+	def run(self, world, mapName, render, source, data):
+		objReplay = replay.Replay(data)
+
+		start = clock()
+		objGame = self.runner.load(world, mapName, objReplay, objReplay.seed)
+		load = clock() - start
+
+		objGame.screen = self.offscreen
+		display = pygame.display.get_surface()
+		frameTime = objGame.step * self.ticksPerFrame
+
+		update = []
+		draw = []
+		flip = []
+		total = []
+
+		while not objReplay.done and not objGame.finished and objGame.ticks < self.ticks:
+			start = clock()
+
+			for i in xrange(self.ticksPerFrame):
+				objGame.update()
+
+			updated = clock()
+			update.append(updated - start)
+
+			if render:
+				objGame.dt = frameTime
+				objGame.draw()
+				drawn = clock()
+
+				display.blit(self.offscreen, (0, 0))
+				pygame.display.flip()
+				flipped = clock()
+
+				draw.append(drawn - updated)
+				flip.append(flipped - drawn)
+				total.append(flipped - start)
+
+			else:
+				total.append(updated - start)
+
+		objGame.leave()
+
+		return {
+			"world": world,
+			"map": mapName,
+			"mode": "render" if render else "headless",
+			"source": source,
+			"ticks": objGame.ticks,
+			"frames": len(total),
+			"load": load * 1000,
+			"update": percentiles(update),
+			"draw": percentiles(draw),
+			"flip": percentiles(flip),
+			"frame": percentiles(total),
+			"peakMemory": peakMemory(),
+			"imageCache": animation.cache.stats(),
+			"chunkCache": objGame.map.chunks.stats()
+		}
+
+def record(world, mapName, ticks):
+	return headless.Headless().run(world, mapName, ticks, script(ticks), 0).recorder.encode()
+
+def recording(world, mapName, ticks):
+	replays = save.Save("save").get("replays") or {}
+
+	if mapName in replays.get(world, {}):
+		return "save", base64.b64decode(replays[world][mapName])
+
+	#recorded in a process of its own, so the timed runs still load the map cold
+	return "script", isolated(record, world, mapName, ticks)
+
+def measure(world, mapName, render, source, data, ticks, ticksPerFrame):
+	return Benchmark(headless.Headless(), ticks, ticksPerFrame).run(world, mapName, render, source, data)
+
+def isolated(function, *args):
+	#a fresh process per run keeps each map's peak memory apart from the maps before it
+	pool = multiprocessing.Pool(1)
+
+	try:
+		return pool.apply(function, args)
+
+	finally:
+		pool.close()
+		pool.join()
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description = "Replay play-throughs of the shipped maps and time them.")
+	parser.add_argument("-o", "--output", default = "benchmark.json", help = "where to write the results")
+	parser.add_argument("-t", "--ticks", type = int, default = 120 * 60, help = "simulation ticks per map")
+	parser.add_argument("-f", "--frame-ticks", type = int, default = 2, help = "simulation ticks per rendered frame")
+	parser.add_argument("-m", "--mode", choices = ("headless", "render", "both"), default = "both")
+	parser.add_argument("-M", "--map", action = "append", default = [], metavar = "WORLD/MAP", help = "time this map instead of the shipped ones, e.g. Game/Stress from stressmap.py")
+	args = parser.parse_args()
+
+	modes = {"headless": [False], "render": [True], "both": [False, True]}[args.mode]
+	results = []
+
+	maps = [tuple(m.split("/", 1)) for m in args.map] or shippedMaps()
+
+	for world, mapName in maps:
+		source, data = recording(world, mapName, args.ticks)
+
+		for render in modes:
+			result = isolated(measure, world, mapName, render, source, data, args.ticks, args.frame_ticks)
+			results.append(result)
+
+			if result["frame"]:
+				print "%-16s %-8s load %7.1fms  frame p50 %6.2fms p99 %6.2fms" % (mapName, result["mode"], result["load"], result["frame"]["p50"], result["frame"]["p99"])
+			else:
+				print "%-16s %-8s load %7.1fms  no frames" % (mapName, result["mode"], result["load"])
+
+	with open(args.output, "w") as f:
+		json.dump({
+			"python": platform.python_version(),
+			"pygame": pygame.version.ver,
+			"platform": platform.platform(),
+			"ticks": args.ticks,
+			"frameTicks": args.frame_ticks,
+			"results": results
+		}, f, indent = 4)
@@ -2,9 +2,49 @@ import pygame
 
 from vector import Vec2d as Vector
 
+LEFT = 1 << 0
+RIGHT = 1 << 1
+TOP = 1 << 2
+BOTTOM = 1 << 3
+SOLID = 1 << 4
+WATER = 1 << 5
+MUD = 1 << 6
+KILL = 1 << 7
+SLOW = 1 << 8
+NOSLIDE = 1 << 9
+KEYHOLE = 1 << 10
+SLOPE_LEFT = 1 << 11
+SLOPE_RIGHT = 1 << 12
+
+COLLIDABLE = LEFT | RIGHT | TOP | BOTTOM | SOLID
+LIQUID = WATER | MUD
+
+propFlags = {"l": LEFT, "r": RIGHT, "u": TOP, "d": BOTTOM, "c": SOLID, "w": WATER, "m": MUD, "k": KILL, "s": SLOW, "n": NOSLIDE, "keyhole": KEYHOLE}
+
+def compileFlags(prop):
+	flags = 0
+
+	for name in prop:
+		if name in propFlags:
+			flags |= propFlags[name]
+
+	if prop.get("p") == "l":
+		flags |= SLOPE_LEFT
+	elif prop.get("p") == "r":
+		flags |= SLOPE_RIGHT
+
+	return flags
+
+def mergeAxes(flags):
+	#merging drops the faces between cells, which only a one-way face lets a character reach
+	across = (flags & (LEFT | RIGHT)) in (0, LEFT | RIGHT)
+	down = (flags & (LEFT | RIGHT | TOP | BOTTOM)) in (0, LEFT | RIGHT | TOP | BOTTOM)
+
+	return across, down
+
 class Block(object):
 
-	def __init__(self, x, y, objMap, img, layer):
+	def __init__(self, x, y, objMap, img, prop):
 		self.image = img
 		self.tilex = x
 		self.tiley = y
@@ -14,9 +54,10 @@ class Block(object):
 
 		self.position = pygame.rect.Rect((self.x, self.y), self.image.get_size())
 
-		self.prop = objMap.getTileProperties((x, y, layer)) or {}
-		self.collidable = "l" in self.prop or "r" in self.prop or "u" in self.prop or "d" in self.prop or "c" in self.prop
-		self.liquid = "w" in self.prop or "m" in self.prop
+		self.prop = prop or {}
+		self.flags = compileFlags(self.prop)
+		self.collidable = bool(self.flags & COLLIDABLE)
+		self.liquid = bool(self.flags & LIQUID)
 		self.hooked = False
 		self.done = False
 		self.slope = False
@@ -36,3 +77,16 @@ class Block(object):
 
 		if "p" in self.prop:
 			self.slope = self.prop["p"]
+
+class Region(object):
+
+	def __init__(self, prop, flags, position):
+		self.position = position
+
+		self.prop = prop
+		self.flags = flags
+		self.collidable = True
+		self.liquid = bool(flags & LIQUID)
+		self.hooked = False
+		self.done = False
+		self.slope = False
@@ -1,11 +1,11 @@
-import pygame, vector, utils
+import pygame, assetpack, vector, utils
 util = utils.Utils()
 
 class Button(object):
 	group = []
-	imgBig = pygame.image.load("assets/sprites/menuBig.png")
-	imgMedium = pygame.image.load("assets/sprites/menuMedium.png")
-	imgSmall = pygame.image.load("assets/sprites/menuSmall.png")
+	imgBig = assetpack.default.image("assets/sprites/menuBig.png")
+	imgMedium = assetpack.default.image("assets/sprites/menuMedium.png")
+	imgSmall = assetpack.default.image("assets/sprites/menuSmall.png")
 	_convertTrigger = False
 
 	def __init__(self, bType, font, text, pos, resolution, callback = None, box = False):
@@ -1,28 +1,28 @@
-import pygame, utils, animation, particles, os
+import pygame, utils, animation, particles
 
 from vector import Vec2d as Vector
+from block import LEFT, RIGHT, TOP, BOTTOM, WATER, MUD, KILL, SLOW, NOSLIDE, KEYHOLE, SLOPE_LEFT, SLOPE_RIGHT, COLLIDABLE
 util = utils.Utils()
 
 class Character(object):
+	nearbyCacheSize = 8
+	drawOrder = 1
+
 	def __init__(self, game, gMap, charType, pos, layer, defaultAnims = True):
 		self.map = gMap
 		self.type = charType
 		self.defaultAnims = defaultAnims
 
 		if self.defaultAnims:
-			self.animList = {}
-			for anim in os.listdir("assets/characters/%s" % self.type):
-				info = anim[:anim.find(".")].split("+")
-				if len(info) < 3:
-					info[1:2] = [1, 1]
-
-				self.animList[info[0]] = animation.Animation("assets/characters/%s/%s" % (self.type, anim), 50, 50, float(info[1]), int(info[2]))
+			self.animList = animation.characterTemplates(self.type)
+			self.animCallbacks = {}
 
 		self.status = ""
 		self.animation = None
 		self._statusChanged = False
 		self.setStatus("standingRight")
-		self.shadow = pygame.image.load("assets/sprites/shadow.png").convert_alpha()
+
+		self.shadow = animation.cache.load("assets/sprites/shadow.png")
 
 		self.particles = particles.Particles(50, 0.5, (0, 0, 0, 50), (0, 0), (self.image.get_width(), self.map.tilemap.tileheight))
 		self.bubbles = particles.Particles(50, 0.5, (0, 0, 255, 50), (0, 0), (self.image.get_width(), self.map.tilemap.tileheight))
@@ -49,11 +49,27 @@ class Character(object):
 		self.jumpAccel = 20
 		self.swimAccel = 50
 
+		self.nearbyHits = 0
+		self.nearbyMisses = 0
+
 		self.spawn()
 
+	@property
+	def drawLayer(self):
+		return self._drawLayer
+
+	@drawLayer.setter
+	def drawLayer(self, value):
+		old = getattr(self, "_drawLayer", None)
+		self._drawLayer = value
+
+		if value != old:
+			self.map.queue.move(self, old, value)
+
 	def spawn(self):
 		self.rect = pygame.rect.Rect((0, 0), self.image.get_size())
 		self.position = pygame.rect.Rect(self.startPos, self.image.get_size())
+		self.lastPosition = self.position.copy()
 		self.realChange = Vector(0, 0)
 		self.velocity = Vector(0, 0)
 		self.direction = "Right"
@@ -76,11 +92,13 @@ class Character(object):
 		self._oldAccel = 0
 		self._oldResting = False
 		self._oldPos = None
-		self._oldNearbyPos = None
+		self._nearbyCache = {}
+		self._nearbyLayer = self.layer
 		self._oldGround = self.getClosestGround(self.layer, self.position)
-		self._oldNearby = []
 		self._oldOff = 0
 		self.shadowPos = None
+
+		self.map.spatial.move(self, self.position, self.layer)
 		self.shadowLooking = True
 		self.isDead = False
 
@@ -137,7 +155,7 @@ class Character(object):
 			destination.y -= 71
 
 			for block in self.getNearbyBlocks(self.layer - 1, destination, 1):
-				if block.collidable and util.collide(destination, block.position):
+				if block.flags & COLLIDABLE and util.collide(destination, block.position):
 					walled = True
 
 			if not walled:
@@ -156,7 +174,7 @@ class Character(object):
 
 			if destination.y < self.map.height:
 				for block in self.getNearbyBlocks(self.layer + 1, destination, 1):
-					if block.collidable and util.collide(destination, block.position):
+					if block.flags & COLLIDABLE and util.collide(destination, block.position):
 						walled = True
 
 				if not walled:
@@ -257,43 +275,44 @@ class Character(object):
 		for block in self.getNearbyBlocks(self.layer, self.position, 1):
 			if util.collide(self.position, block.position):
 				limit = block.position
+				flags = block.flags
 
-				if block.collidable:
+				if flags & COLLIDABLE:
 					if self.position.top < limit.bottom and self.position.bottom > limit.top:
-						if "l" in block.prop and self.position.right >= limit.left and last.right <= limit.left:
+						if flags & LEFT and self.position.right >= limit.left and last.right <= limit.left:
 							self.position.right = limit.left
 							if self.velocity.x > 0:
 								self.velocity.x = 0
 
-							if not self.resting and not "n" in block.prop:
+							if not self.resting and not flags & NOSLIDE:
 								self.wallSliding = -1
 								if self.velocity.y > 0:
 									self.speedModifier = self.slideModifier
 
-						if "r" in block.prop and self.position.left <= limit.right and last.left >= limit.right:
+						if flags & RIGHT and self.position.left <= limit.right and last.left >= limit.right:
 							self.position.left = limit.right
 							if self.velocity.x < 0:
 								self.velocity.x = 0
 
-							if not self.resting and not "n" in block.prop:
+							if not self.resting and not flags & NOSLIDE:
 								self.wallSliding = 1
 								if self.velocity.y > 0:
 									self.speedModifier = self.slideModifier
 
 					if self.position.left < limit.right and self.position.right > limit.left:
-						if "u" in block.prop and self.position.bottom >= limit.top and last.bottom <= limit.top:
+						if flags & TOP and self.position.bottom >= limit.top and last.bottom <= limit.top:
 							self.position.bottom = limit.top
 							self.resting = True
 							if self.velocity.y > 0:
 								self.velocity.y = 0
 
-						if "d" in block.prop and self.position.top <= limit.bottom and last.top >= limit.bottom:
+						if flags & BOTTOM and self.position.top <= limit.bottom and last.top >= limit.bottom:
 							self.position.top = limit.bottom
 							if self.velocity.y < 0:
 								self.velocity.y = 0
 
 					if limit.left - 3 <= self.position.centerx <= limit.right + 3:
-						if block.slope == "r":
+						if flags & SLOPE_RIGHT:
 							sloped = int(util.remap(self.position.centerx, float(limit.left), float(limit.right), limit.bottom, limit.top))
 
 							if self.position.bottom >= sloped:
@@ -303,7 +322,7 @@ class Character(object):
 								if self.velocity.y > 0:
 									self.velocity.y = 0
 
-						elif block.slope == "l":
+						elif flags & SLOPE_LEFT:
 							sloped = int(util.remap(self.position.centerx, float(limit.right), float(limit.left), limit.bottom, limit.top)) - 1
 							
 							if self.position.bottom >= sloped:
@@ -313,23 +332,23 @@ class Character(object):
 								if self.velocity.y > 0:
 									self.velocity.y = 0
 
-				if self.type == "player" and "keyhole" in block.prop and not block.hooked:
-					if (block.tilex, block.tiley + 1) in self.map.layers[self.layer].blocks and "keyhole" in self.map.layers[self.layer].blocks[(block.tilex, block.tiley + 1)].prop:
+				if self.type == "player" and flags & KEYHOLE and not block.hooked:
+					if (block.tilex, block.tiley + 1) in self.map.layers[self.layer].blocks and self.map.layers[self.layer].blocks[(block.tilex, block.tiley + 1)].flags & KEYHOLE:
 						self._keyTarget.append(self.map.layers[self.layer].blocks[(block.tilex, block.tiley + 1)])
 					else:
 						self._keyTarget.append(block)
 
-				if "s" in block.prop:
+				if flags & SLOW:
 					self.speedModifier = 0.4
 
-				if "w" in block.prop:
+				if flags & WATER:
 					self.swimming = True
 					self.speedModifier = 0.5
 
-				if "m" in block.prop:
+				if flags & MUD:
 					self.speedModifier = 0.2
 
-				if "k" in block.prop:
+				if flags & KILL:
 					self.die(game)
 
 		if not game.paused:
@@ -346,33 +365,43 @@ class Character(object):
 		self.movingLeft = False
 
 	def draw(self, game):
+		self.rect.topleft = game.viewport.toScreen(self.interpolate(game.alpha))
+
 		if self.map.drawShadow:
 			self.genShadow(game)
 			if self.shadowPos:
 				game.screen.blit(self.shadow, self.shadowPos)
 
+		game.screen.blit(self.image, self.rect)
+
+	def animate(self, game, dt):
 		self.particles.update(game, self.position.midleft)
 		self.bubbles.update(game, self.position.midleft)
 
-		if self.defaultAnims and (not game.paused or self.isDead):
-			self.animation.update(game.dt * 0.001)
+		if self.defaultAnims:
+			self.animation.update(dt)
+			self.image = self.animation.getSplice()
+
+	def interpolate(self, alpha):
+		x = self.lastPosition.x + (self.position.x - self.lastPosition.x) * alpha
+		y = self.lastPosition.y + (self.position.y - self.lastPosition.y) * alpha
 
-		game.screen.blit(self.image, (self.position.x - game.viewport.rect.x, self.position.y - game.viewport.rect.y))
+		return int(round(x)), int(round(y))
 
 	def setStatus(self, status, callback = None):
 		if self.defaultAnims:
 			if not self._statusChanged and status != self.status and status in self.animList:
 				self._statusChanged = True
 
+				if callback:
+					self.animCallbacks[status] = callback
+
 				if self.animation:
-					self.animation.frame = 0
+					self.animation.play(self.animList[status], self.animCallbacks.get(status))
+				else:
+					self.animation = animation.Animation(self.animList[status])
 
-				self.animation = self.animList[status]
 				self.status = status
-
-				if callback:
-					self.animation.setCallback(callback)
-
 				self.image = self.animation.getSplice()
 
 	def genShadow(self, game):
@@ -431,25 +460,60 @@ class Character(object):
 			return self._oldGround
 
 		else:
-			for ground in self.map.layers[layer].grounds[position.centerx / self.map.tilemap.tilewidth]:
-				if position.y <= ground.y or (self.layerChanging and util.collide(position, ground.position)):
-					self._oldPos = (position.centerx / self.map.tilemap.tilewidth, position.centery / self.map.tilemap.tileheight)
+			ground = self.findGround(layer, position)
+
+			if ground:
+				self._oldPos = (position.centerx / self.map.tilemap.tilewidth, position.centery / self.map.tilemap.tileheight)
+
+			return ground
+
+	def findGround(self, layer, position):
+		mapLayer = self.map.layers[layer]
 
-					return ground
+		for pos in mapLayer.grounds[position.centerx / self.map.tilemap.tilewidth]:
+			ground = mapLayer.blocks[pos]
+
+			if position.y <= ground.y or (self.layerChanging and util.collide(position, ground.position)):
+				return ground
+
+	def castsShadowOn(self, rect):
+		ground = self.findGround(self.layer, self.position)
+
+		return ground is not None and ground.position.colliderect(rect)
 
 	def getNearbyBlocks(self, layer, position, tileRadius):
+		tileX = position.centerx / self.map.tilemap.tilewidth
+		tileY = position.centery / self.map.tilemap.tileheight
+
+		key = (layer, tileX, tileY, tileRadius)
+
+		if self.layer != self._nearbyLayer or len(self._nearbyCache) >= Character.nearbyCacheSize:
+			self._nearbyCache.clear()
+			self._nearbyLayer = self.layer
+
+		if key in self._nearbyCache:
+			self.nearbyHits += 1
+			return self._nearbyCache[key]
+
+		self.nearbyMisses += 1
+
 		d = []
+		mapLayer = self.map.layers[layer]
 
-		if (position.centerx / self.map.tilemap.tilewidth, position.centery / self.map.tilemap.tileheight) == self._oldNearbyPos and self._oldNearby != []:
-			return self._oldNearby
+		for x in xrange(max(0, tileX - tileRadius), min(mapLayer.width, tileX + tileRadius + 1)):
+			for y in xrange(max(0, tileY - tileRadius), min(mapLayer.height, tileY + tileRadius + 1)):
+				i = y * mapLayer.width + x
 
-		else:
-			for i in xrange(tileRadius * 2 + 1):
-				for j in xrange(tileRadius * 2 + 1):
-					if (position.centerx / self.map.tilemap.tilewidth + i - tileRadius, position.centery / self.map.tilemap.tileheight + j - tileRadius) in self.map.layers[layer].blocks:
-						d.append(self.map.layers[layer].blocks[(position.centerx / self.map.tilemap.tilewidth + i - tileRadius, position.centery / self.map.tilemap.tileheight + j - tileRadius)])
+				if mapLayer.flags[i]:
+					if mapLayer.solids[i]:
+						region = mapLayer.regions[mapLayer.solids[i]]
+
+						if not region in d:
+							d.append(region)
+
+					else:
+						d.append(mapLayer.blocks[(x, y)])
 
-			self._oldNearbyPos = (position.centerx / self.map.tilemap.tilewidth, position.centery / self.map.tilemap.tileheight)
-			self._oldNearby = d
+		self._nearbyCache[key] = d
 
-			return d
+		return d
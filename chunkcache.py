@@ -0,0 +1,63 @@
+import collections
+
+class ChunkCache(object):
+
+	def __init__(self, budget, keep = 30):
+		self.budget = budget
+		self.keep = keep
+		self.chunks = collections.OrderedDict()
+		self.frames = {}
+		self.frame = 0
+		self.size = 0
+		self.bakes = 0
+
+	def begin(self):
+		self.frame += 1
+
+	def get(self, layer, key):
+		name = (layer.index, key)
+
+		if name in self.chunks:
+			chunk = self.chunks.pop(name)
+
+		else:
+			chunk = layer.bakeChunk(key)
+			self.bakes += 1
+
+			if chunk is None:
+				return None
+
+			self.size += self.sizeOf(chunk)
+
+		self.chunks[name] = chunk
+		self.frames[name] = self.frame
+		self.evict()
+
+		return chunk
+
+	def __contains__(self, name):
+		return name in self.chunks
+
+	def sizeOf(self, chunk):
+		surface, offset = chunk
+
+		return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+	def evict(self):
+		#chunks drawn in the last few frames are likely on screen again, so a budget below that costs memory instead of rebaking every frame
+		while self.size > self.budget:
+			name = next(iter(self.chunks))
+
+			if self.frames[name] > self.frame - self.keep:
+				break
+
+			self.size -= self.sizeOf(self.chunks.pop(name))
+			del self.frames[name]
+
+	def stats(self):
+		return {
+			"chunks": len(self.chunks),
+			"size": self.size,
+			"budget": self.budget,
+			"bakes": self.bakes
+		}
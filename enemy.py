@@ -7,11 +7,19 @@ class Enemy(character.Character):
 	blue = "enemyBlue"
 	yellow = "enemyYellow"
 	red = "enemyRed"
+	thinkInterval = 4
 
 	def __init__(self, game, gMap, enemyType, pos, layer):
 		super(Enemy, self).__init__(game, gMap, enemyType, pos, layer)
 
 		self.inProximity = False
+		self.chasing = False
+		self.steer = 0
+		self.climb = False
+
+		#stagger decisions so enemies don't all think on the same tick
+		self.serial = len(Enemy.group)
+		self.nextThink = self.serial % Enemy.thinkInterval
 
 		if self.type in [Enemy.yellow, Enemy.red]:
 			self.moveSpeed = 450
@@ -24,77 +32,57 @@ class Enemy(character.Character):
 	def die(self, game):
 		self.spawn()
 
-	def update(self, game, dt):
+	def think(self, game):
 		in_x = abs(self.position.centerx - game.player.position.centerx) < game.halfResolution[0]
 		in_y = abs(self.position.centery - game.player.position.centery) < game.halfResolution[1]
 		self.inProximity = in_x and in_y
 
-		update = True
-
-		if self.type == Enemy.blue:
-			if self.inProximity and self.layer == game.player.layer:
-
-				self.movingLeft = game.player.position.centerx < self.position.centerx
-				self.movingRight = game.player.position.centerx > self.position.centerx
-
-				if game.player.position.centery < self.position.centery:
-					self.holdJump = True
-
-					if self.resting:
-						self.jump()
-
-				if game.player.position.centery > self.position.centery and self.holdJump:
-					self.holdJump = False
+		self.chasing = self.inProximity and (self.type != Enemy.blue or self.layer == game.player.layer)
+		self.steer = 0
+		self.climb = False
 
-			elif self.resting and self.velocity.x == 0:
-				update = False
+		if not self.chasing:
+			return
 
-		if self.type == Enemy.yellow:
-			if self.inProximity:
-
-				if game.player.position.centerx < self.position.centerx:
-					self.moveLeft(dt)
-
-				elif game.player.position.centerx > self.position.centerx:
-					self.moveRight(dt)
-
-				if game.player.position.centery < self.position.centery:
-					self.holdJump = True
-
-					if self.resting:
-						self.jump()
+		if self.type == Enemy.red:
+			if game.player.layer > self.layer:
+				self.toFront(game)
+			elif game.player.layer < self.layer:
+				self.toBack(game)
 
-				if game.player.position.centery > self.position.centery and self.holdJump:
-					self.holdJump = False
+		if game.player.position.centerx < self.position.centerx:
+			self.steer = -1
 
-			elif self.resting and self.velocity.x == 0:
-				update = False
+		elif game.player.position.centerx > self.position.centerx:
+			self.steer = 1
 
-		if self.type == Enemy.red:
-			if self.inProximity:
+		if game.player.position.centery < self.position.centery:
+			self.holdJump = True
+			self.climb = True
 
-				if game.player.layer > self.layer:
-					self.toFront(game)
-				elif game.player.layer < self.layer:
-					self.toBack(game)
+		if game.player.position.centery > self.position.centery and self.holdJump:
+			self.holdJump = False
 
-				if game.player.position.centerx < self.position.centerx:
-					self.moveLeft(dt)
+	def update(self, game, dt):
+		if game.ticks >= self.nextThink:
+			self.think(game)
+			self.nextThink = game.ticks + Enemy.thinkInterval
 
-				elif game.player.position.centerx > self.position.centerx:
-					self.moveRight(dt)
+		if self.chasing:
+			if self.type == Enemy.blue:
+				self.movingLeft = self.steer < 0
+				self.movingRight = self.steer > 0
 
-				if game.player.position.centery < self.position.centery:
-					self.holdJump = True
+			elif self.steer < 0:
+				self.moveLeft(dt)
 
-					if self.resting:
-						self.jump()
+			elif self.steer > 0:
+				self.moveRight(dt)
 
-				if game.player.position.centery > self.position.centery and self.holdJump:
-					self.holdJump = False
+			if self.climb and self.resting:
+				self.jump()
 
-			elif self.resting and self.velocity.x == 0:
-				update = False
+		elif self.resting and self.velocity.x == 0:
+			return
 
-		if update:
-			super(Enemy, self).update(game, dt)
+		super(Enemy, self).update(game, dt)
@@ -1,25 +1,39 @@
-import pygame, player, enemy, mapper, viewport, animation, particles, item, sys, button, save, utils, timer
+import pygame, player, enemy, mapper, viewport, animation, particles, item, sys, button, save, utils, timer, replay, scheduler, random
+
+from vector import Vec2d as Vector
 util = utils.Utils()
 
 class Game(object):
+	step = 1000 / 120.
+	maxFrame = 120
 
-	def __init__(self, parent, world, mapName):
+	def __init__(self, parent, world, mapName, headless = False, seed = None):
 		self.running = True
+		self.headless = headless
 		self.paused = False
 		self.finished = False
 		self.screen = parent.screen
 		self.clock = parent.clock
+		self.profiler = parent.profiler
 		self.fps = parent.fps
 		self.smallFont = parent.smallFont
 		self.mediumFont = parent.mediumFont
 		self.bigFont = parent.bigFont
 		self.resolution = parent.resolution
 		self.halfResolution = parent.halfResolution
-		self.tileset = animation.Animation("assets/sprites/sheet.png", 70, 35, 1, 1)
+		self.tileset = animation.Animation(animation.Template("assets/sprites/sheet.png", 70, 35, 1, 1))
 		self.dt = 0
+		self.accumulator = 0
+		self.alpha = 0
+		self.ticks = 0
+		self.nearPlayer = set()
 		self.returnValue = 0
 		self.world = world
 		self.mapName = mapName
+		self.seed = random.getrandbits(32) if seed is None else seed
+
+		particles.rng.seed(self.seed)
+		self.recorder = replay.Recorder(self.seed)
 
 		self.save = save.Save("save")
 
@@ -36,17 +50,24 @@ class Game(object):
 		self.map = mapper.Mapper(self, self.world, self.mapName)
 
 		self.player = player.Player(self)
+		self.player.recorder = self.recorder
 		self.viewport = viewport.Viewport(self, self.player.position.x, self.player.position.y)
+		self.scheduler = scheduler.Scheduler(self)
+
+		if not self.headless:
+			self.run()
 
+	def run(self):
 		while self.running:
-			self.dt = self.clock.tick(self.fps)
+			frame = min(self.clock.tick(self.fps), Game.maxFrame)
 			pygame.display.set_caption("Layer Switcher %3d FPS" % (self.clock.get_fps()), "Layer Switcher")
-
-			if self.dt > 120:
-				self.dt = 120
+			self.profiler.begin()
 
 			for event in pygame.event.get():
+				self.profiler.handle(event)
+
 				if event.type == pygame.QUIT:
+					self.profiler.stopTrace()
 					pygame.quit()
 					sys.exit(0)
 					return
@@ -86,61 +107,136 @@ class Game(object):
 					if event.key == pygame.K_SPACE:
 						self.player.holdJump = False
 
-			self.screen.fill(self.map.bgColor)
-			self.map.drawBackground(self)
+			self.profiler.mark("events")
+			self.accumulator += frame
 
-			if not self.paused and not self.player.isDead:
-				self.player.update(self, self.dt * 0.001)
+			while self.accumulator >= Game.step:
+				self.update()
+				self.accumulator -= Game.step
 
-				for gItem in item.Item.group:
-					gItem.update(self, self.dt * 0.001)
+			self.dt = frame
+			self.alpha = self.accumulator / Game.step
 
-				for gEnemy in enemy.Enemy.group:
-					gEnemy.update(self, self.dt * 0.001)
-					if util.collide(self.player.position, gEnemy.position) and self.player.layer == gEnemy.layer:
-						self.player.die(self)
+			self.draw()
+			self.profiler.draw(self.screen, self.smallFont)
+			self.profiler.mark("overlay")
 
-				self.viewport.update(self, self.player.position.centerx, self.player.position.centery)
+			pygame.display.flip()
+			self.profiler.mark("flip")
+			self.profiler.end()
 
-			endTrigger = True
+	def update(self):
+		self.dt = Game.step
+		self.ticks += 1
+		dt = self.dt * 0.001
+		awake = self.scheduler.update(self)
 
-			for layer in self.map.drawable:
-				layer.draw(self)
+		for character in [self.player] + item.Item.group + awake:
+			character.lastPosition = character.position.copy()
 
-				if layer.normal:
-					for subLayer in layer.decor:
-						subLayer.draw(self)
+		self.viewport.lastPosition = Vector(self.viewport.position)
+		self.profiler.mark("update")
 
-					for text in mapper.MapText.group[layer.normalID]:
-						text.draw(self)
+		if not self.paused and not self.player.isDead:
+			self.player.update(self, dt)
+			self.profiler.mark("player")
 
-					for group in particles.Particles.groups:
-						group.draw(self, layer.normalID)
+			self.nearPlayer = self.map.spatial.query(self.player.position, self.player.layer)
 
-					for gItem in item.Item.group:
-						if layer.normalID == gItem.drawLayer:
-							gItem.draw(self)
+			for gItem in item.Item.group:
+				gItem.update(self, dt)
 
-					for gEnemy in enemy.Enemy.group:
-						if layer.normalID == gEnemy.drawLayer:
-							gEnemy.draw(self)
+			self.profiler.mark("items")
 
-					if layer.normalID == self.player.drawLayer:
-						self.player.draw(self)
+			for gEnemy in awake:
+				gEnemy.update(self, dt)
 
-					for keyHole in layer.keyHoles:
-						if not keyHole.done:
-							endTrigger = False
+			self.refile(awake)
 
-			if endTrigger and self.map.hasKeyHoles and not self.finished:
-				self.end()
+			for gEnemy in self.map.spatial.query(self.player.position, self.player.layer):
+				if isinstance(gEnemy, enemy.Enemy) and util.collide(self.player.position, gEnemy.position):
+					self.player.die(self)
 
-			if self.finished:
-				self.drawFinished()
+			self.profiler.mark("enemies")
 
-			self.timer.updateAndDraw(self)
+			self.viewport.update(self, self.player.position.centerx, self.player.position.centery)
+			self.profiler.mark("viewport")
 
-			pygame.display.flip()
+		if not self.paused:
+			particles.pool.age(dt)
+
+			for gItem in item.Item.group:
+				gItem.animate(self, dt)
+
+			for gEnemy in awake:
+				gEnemy.animate(self, dt)
+
+		if not self.paused or self.player.isDead:
+			self.player.animate(self, dt)
+
+		self.profiler.mark("animate")
+
+		self.timer.update(self)
+
+		if self.map.hasKeyHoles and not self.finished and self.keyHolesDone():
+			self.end()
+
+		self.profiler.mark("timer")
+
+	def refile(self, awake):
+		for character in [self.player] + item.Item.group + awake:
+			self.map.spatial.move(character, character.position, character.layer)
+
+	def keyHolesDone(self):
+		for layer in self.map.layers:
+			for keyHole in layer.keyHoles:
+				if not keyHole.done:
+					return False
+
+		return True
+
+	def draw(self):
+		self.viewport.interpolate(self, self.alpha)
+
+		self.map.chunks.begin()
+		self.screen.fill(self.map.bgColor)
+		self.map.drawBackground(self)
+		area = self.viewport.visibleArea(self)
+		visible = self.map.spatial.query(area)
+
+		if self.map.drawShadow:
+			visible.update([character for character in self.map.spatial.query(self.viewport.shadowArea(self)) if not character in visible and character.castsShadowOn(area)])
+
+		self.profiler.mark("background")
+
+		for layer in self.map.drawable:
+			layer.draw(self)
+
+			if layer.normal:
+				for subLayer in layer.decor:
+					subLayer.draw(self)
+
+			self.profiler.mark("layer %d" % layer.index)
+
+			if layer.normal:
+				for text in mapper.MapText.group[layer.normalID]:
+					text.draw(self)
+
+				self.profiler.mark("texts")
+
+				particles.pool.draw(self, layer.normalID)
+
+				self.profiler.mark("particles")
+
+				self.map.queue.draw(self, layer.normalID, visible)
+
+				self.profiler.mark("characters")
+
+		if self.finished:
+			self.drawFinished()
+
+		self.timer.draw(self)
+		self.profiler.mark("timer")
 
 	def text(self, txt, x = 0, y = 0):
 		render = self.mediumFont.render(str(txt), 1, (0, 0, 0))
@@ -154,15 +250,16 @@ class Game(object):
 	def end(self):
 		self.paused = True
 		self.finished = True
+		self.timer.render(self)
 
-		worldData = self.save.get(self.map.world)
+		if self.headless:
+			return
 
-		if worldData and self.map.mapName in worldData:
-			if self.timer.current < float(worldData[self.map.mapName]):
-				self.save.add(self.map.world, {self.map.mapName: self.timer.current})
+		worldData = self.save.get(self.map.world)
 
-		else:
+		if not worldData or self.map.mapName not in worldData or self.timer.current < float(worldData[self.map.mapName]):
 			self.save.add(self.map.world, {self.map.mapName: self.timer.current})
+			self.saveReplay()
 
 		if self.timer.best == "n/a" or self.timer.current < self.timer.best:
 			self.movingTexts[2].setText("time: %s!" % self.timer.text)
@@ -171,8 +268,15 @@ class Game(object):
 			self.movingTexts[2].setText("time: %s" % self.timer.text)
 			self.movingTexts[3].setText("best: %s" % self.timer.textBest)
 
+	def saveReplay(self):
+		replays = self.save.get("replays") or {}
+		replays.setdefault(self.map.world, {})[self.map.mapName] = self.recorder.toString()
+
+		self.save.set("replays", replays)
+
 	def leave(self):
 		self.running = False
-		particles.Particles.groups = []
+		animation.cache.release()
+		particles.pool.clear()
 		enemy.Enemy.group = []
 		item.Item.group = []
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+
+import pygame, game, replay, profiler, animation, assetpack, os, sys, time
+
+class Headless(object):
+
+	def __init__(self, resolution = (1280, 720)):
+		os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+		pygame.display.init()
+		pygame.font.init()
+
+		self.screen = pygame.display.set_mode(resolution, 0, 32)
+		self.clock = pygame.time.Clock()
+		self.profiler = profiler.Profiler()
+		self.fps = 0
+		self.resolution = resolution
+		self.halfResolution = (self.resolution[0] // 2, self.resolution[1] // 2)
+
+		self.smallFont = pygame.font.Font(assetpack.default.open("assets/fonts/OpenSans-Semibold.ttf"), 14)
+		self.mediumFont = pygame.font.Font(assetpack.default.open("assets/fonts/OpenSans-Semibold.ttf"), 30)
+		self.bigFont = pygame.font.Font(assetpack.default.open("assets/fonts/OpenSans-Semibold.ttf"), 72)
+
+	def load(self, world, mapName, script = None, seed = None):
+		objGame = game.Game(self, world, mapName, True, seed)
+		objGame.player.input = script
+
+		return objGame
+
+	def run(self, world, mapName, ticks, script = None, seed = None):
+		objGame = self.load(world, mapName, script, seed)
+
+		while objGame.ticks < ticks and not objGame.finished:
+			objGame.update()
+
+		objGame.leave()
+
+		return objGame
+
+	def playback(self, world, mapName, data):
+		objReplay = replay.Replay(data)
+		objGame = self.load(world, mapName, objReplay, objReplay.seed)
+
+		while not objReplay.done and not objGame.finished:
+			objGame.update()
+
+		objGame.leave()
+
+		return objGame
+
+class Script(object):
+
+	def __init__(self, events = ()):
+		self.events = sorted(events)
+		self.index = 0
+		self.held = set()
+
+	def poll(self, game, player):
+		while self.index < len(self.events) and self.events[self.index][0] <= game.ticks:
+			tick, key, pressed = self.events[self.index]
+			self.index += 1
+
+			if pressed:
+				self.held.add(key)
+
+				if key == pygame.K_w:
+					player.key_w = True
+
+				if key == pygame.K_s:
+					player.key_s = True
+
+				if key == pygame.K_SPACE:
+					player.spaced = True
+
+			else:
+				self.held.discard(key)
+
+				if key == pygame.K_SPACE:
+					player.holdJump = False
+
+		player.movingLeft = pygame.K_a in self.held
+		player.movingRight = pygame.K_d in self.held
+
+if __name__ == "__main__":
+	if len(sys.argv) < 3:
+		print "usage: headless.py world map [ticks]"
+		sys.exit(1)
+
+	ticks = int(sys.argv[3]) if len(sys.argv) > 3 else 120 * 60
+	runner = Headless()
+
+	start = time.time()
+	objGame = runner.run(sys.argv[1], sys.argv[2], ticks, Script([(0, pygame.K_d, True)]))
+	elapsed = time.time() - start
+
+	print "%d ticks in %.3fs (%.0f ticks/s, %.1fx real time)" % (objGame.ticks, elapsed, objGame.ticks / elapsed, objGame.ticks * objGame.step * 0.001 / elapsed)
+	print "timer %.3fs, finished: %s" % (objGame.timer.current, objGame.finished)
+	print "image cache %(images)d images, %(size)d/%(budget)d bytes, hit rate %(hitRate).2f, %(atlasImages)d from %(atlasSize)d bytes of atlas pages" % animation.cache.stats()
@@ -0,0 +1,75 @@
+import assetpack, atlas, collections
+
+class ImageCache(object):
+
+	def __init__(self, budget):
+		self.budget = budget
+		self.images = collections.OrderedDict()
+		self.pinned = set()
+		self.atlased = set()
+		self.size = 0
+		self.hits = 0
+		self.misses = 0
+		self.onEvict = None
+
+	def load(self, path):
+		if path in self.images:
+			self.hits += 1
+			img = self.images.pop(path)
+
+		else:
+			self.misses += 1
+			img = atlas.default.region(path)
+
+			#an atlas region shares its page with every other region, so dropping it would free nothing
+			if img is not None:
+				self.atlased.add(path)
+
+			else:
+				img = assetpack.default.image(path).convert_alpha()
+				self.size += self.sizeOf(img)
+
+		self.images[path] = img
+		self.pinned.add(path)
+		self.evict()
+
+		return img
+
+	def sizeOf(self, img):
+		return img.get_width() * img.get_height() * img.get_bytesize()
+
+	def release(self):
+		#the current map is done with its sheets, so they may be evicted from now on
+		self.pinned = set()
+		self.evict()
+
+	def evict(self):
+		if self.size <= self.budget:
+			return
+
+		for path in list(self.images):
+			if path not in self.pinned and path not in self.atlased:
+				self.size -= self.sizeOf(self.images.pop(path))
+
+				if self.onEvict:
+					self.onEvict(path)
+
+				if self.size <= self.budget:
+					break
+
+	def hitRate(self):
+		total = self.hits + self.misses
+
+		return self.hits / float(total) if total else 0.
+
+	def stats(self):
+		return {
+			"images": len(self.images),
+			"size": self.size,
+			"budget": self.budget,
+			"atlasImages": len(self.atlased),
+			"atlasSize": atlas.default.size(),
+			"hits": self.hits,
+			"misses": self.misses,
+			"hitRate": self.hitRate()
+		}
@@ -1,10 +1,11 @@
-import pygame, character, utils
+import character, animation, utils
 
 from vector import Vec2d as Vector
 util = utils.Utils()
 
 class Item(character.Character):
 	group = []
+	drawOrder = 0
 	yellow = "keyYellow"
 	green = "keyGreen"
 	red = "keyRed"
@@ -12,7 +13,7 @@ class Item(character.Character):
 
 	def __init__(self, game, gMap, itemType, pos, layer):
 		self.type = itemType
-		self.image = pygame.image.load("assets/sprites/%s.png" % self.type).convert_alpha()
+		self.image = animation.cache.load("assets/sprites/%s.png" % self.type)
 
 		super(Item, self).__init__(game, gMap, itemType, pos, layer, False)
 
@@ -64,7 +65,7 @@ class Item(character.Character):
 			if self.hookType == "player" and self.oldLayer != game.player.oldLayer:
 				self.oldLayer = game.player.oldLayer
 
-		elif util.collide(game.player.position, self.position) and game.player.layer == self.layer:
+		elif self in game.nearPlayer and util.collide(game.player.position, self.position) and game.player.layer == self.layer:
 			if len(game.player.keyList) > 0:
 				self.hook = game.player.keyList[-1].position
 				self.hookType = "player"
@@ -1,12 +1,47 @@
-import pygame, block
+import pygame, block, array
+
+from itertools import imap
+from pytmx.utils import merge_cells
+
+class Blocks(object):
+
+	def __init__(self, layer):
+		#a Block is only built the first time its cell is looked at, most cells are only ever drawn through a baked chunk
+		self.layer = layer
+		self.blocks = {}
+
+	def __contains__(self, pos):
+		x, y = pos
+
+		return 0 <= x < self.layer.width and 0 <= y < self.layer.height and bool(self.layer.parent.tilemap.getTileGID(x, y, self.layer.index))
+
+	def __getitem__(self, pos):
+		if pos not in self.blocks:
+			if pos not in self:
+				raise KeyError(pos)
+
+			tilemap = self.layer.parent.tilemap
+			self.add(pos[0], pos[1], tilemap.getTileImage(pos[0], pos[1], self.layer.index), tilemap.getTileProperties((pos[0], pos[1], self.layer.index)))
+
+		return self.blocks[pos]
+
+	def add(self, x, y, img, prop):
+		if (x, y) not in self.blocks:
+			self.blocks[(x, y)] = block.Block(x, y, self.layer.parent.tilemap, img, prop)
+
+		return self.blocks[(x, y)]
 
 class Layer(object):
+	chunkSize = 8
 
 	def __init__(self, parent, layer):
 		self.parent = parent
 		self.raw = layer
 
-		self.blocks = {}
+		self.index = self.parent.layerCount
+		self.width = self.parent.tilemap.width
+		self.height = self.parent.tilemap.height
+		self.blocks = Blocks(self)
 
 		if hasattr(self.raw, "decorations"):
 			self.normal = False
@@ -29,41 +64,177 @@ class Layer(object):
 			self.parent.layers.append(self)
 			self.parent.drawable.append(self)
 
-		for x in xrange(0, self.parent.tilemap.width):
+		if self.normal:
+			cached = self.parent.cache.layers.get(self.index)
+
+			if cached is None:
+				self.compileFlags()
+				self.merge()
+				self.scan()
+
+			else:
+				self.restore(cached)
+
+			if self.keyHoles:
+				self.parent.hasKeyHoles = True
+
+		self.bake()
+
+	def gidFlags(self):
+		tilemap = self.parent.tilemap
+
+		return dict((gid, block.compileFlags(tilemap.getTilePropertiesByGID(gid) or {}) if gid else 0) for gid in set(self.raw.data))
+
+	def compileFlags(self):
+		self.flags = array.array("H", imap(self.gidFlags().__getitem__, self.raw.data))
+
+	def merge(self):
+		tilemap = self.parent.tilemap
+		values = {}
+
+		for gid, flags in self.gidFlags().iteritems():
+			prop = tilemap.getTilePropertiesByGID(gid) or {}
+
+			if flags & block.COLLIDABLE and not prop.get("p") and not "keyhole" in prop:
+				values[gid] = (flags, frozenset(prop.iteritems()))
+
+		cells = dict((pos, values[gid]) for gid in values for pos in self.raw.positions[gid])
+
+		self.regions = [None]
+		self.regionCells = [None]
+		self.solids = array.array("I", [0]) * (self.width * self.height)
 
-			if self.normal:
-				self.grounds.append([])
-				nextGround = True
+		for x, y, width, height, value in merge_cells(cells, self.width, self.height, lambda value: block.mergeAxes(value[0])):
+			if width * height > 1:
+				rects = [pygame.rect.Rect((tx * tilemap.tilewidth, ty * tilemap.tileheight), tilemap.images[self.raw.data[ty * self.width + tx]].get_size()) for ty in xrange(y, y + height) for tx in xrange(x, x + width)]
 
-			for y in xrange(0, self.parent.tilemap.height):
-				img = self.parent.tilemap.getTileImage(x, y, self.parent.layerCount)
-				
-				if img:
-					rawBlock = block.Block(x, y, self.parent.tilemap, img, self.parent.layerCount)
-					self.blocks[(x, y)] = rawBlock
+				self.addRegion(x, y, width, height, rects[0].unionall(rects))
 
-					if self.normal:
-						if "keyhole" in rawBlock.prop:
-							self.keyHoles.append(rawBlock)
-							self.parent.hasKeyHoles = True
+	def addRegion(self, x, y, width, height, position):
+		gid = self.raw.data[y * self.width + x]
+		index = len(self.regions)
 
-							if (x, y - 1) in self.blocks and "keyhole" in self.blocks[(x, y - 1)].prop:
-								self.keyHoles.remove(self.blocks[(x, y - 1)])
+		self.regions.append(block.Region(self.parent.tilemap.getTilePropertiesByGID(gid) or {}, self.flags[y * self.width + x], position))
+		self.regionCells.append((x, y, width, height))
 
-						if nextGround and (rawBlock.collidable and not "c" in rawBlock.prop) or (rawBlock.liquid and not self.blocks[(x, y - 1)].liquid):
-							self.grounds[-1].append(rawBlock)
+		for row in xrange(y, y + height):
+			self.solids[row * self.width + x:row * self.width + x + width] = array.array("I", [index]) * width
 
-							if rawBlock.liquid:
-								nextGround = True
-							else:
-								nextGround = False
+	def scan(self):
+		keyHoles = set(self.parent.tilemap.getTileLocationsByProperty("keyhole", self.index))
 
-				elif self.normal:
+		for x, y in sorted(keyHoles):
+			if not (x, y + 1) in keyHoles:
+				self.keyHoles.append(self.blocks[(x, y)])
+
+		data = self.raw.data
+		flags = self.flags
+
+		for x in xrange(0, self.width):
+			self.grounds.append([])
+			nextGround = True
+
+			for y in xrange(0, self.height):
+				i = y * self.width + x
+
+				if data[i]:
+					liquid = flags[i] & block.LIQUID
+
+					if nextGround and (flags[i] & block.COLLIDABLE and not flags[i] & block.SOLID) or (liquid and not (y > 0 and flags[i - self.width] & block.LIQUID)):
+						self.grounds[-1].append((x, y))
+
+						if liquid:
+							nextGround = True
+						else:
+							nextGround = False
+
+				else:
 					nextGround = True
 
+	def restore(self, cached):
+		self.flags = array.array("H")
+		self.flags.fromstring(cached["flags"])
+
+		self.regions = [None]
+		self.regionCells = [None]
+		self.solids = array.array("I", [0]) * (self.width * self.height)
+
+		for x, y, width, height, position in cached["regions"]:
+			self.addRegion(x, y, width, height, pygame.rect.Rect(position))
+
+		self.grounds = cached["grounds"]
+		self.keyHoles = [self.blocks[pos] for pos in cached["keyHoles"]]
+
+	def cacheData(self):
+		if not self.normal:
+			return {}
+
+		return {
+			"flags": self.flags.tostring(),
+			"regions": [cells + (tuple(region.position),) for cells, region in zip(self.regionCells, self.regions)[1:]],
+			"grounds": self.grounds,
+			"keyHoles": [(rawBlock.tilex, rawBlock.tiley) for rawBlock in self.keyHoles]
+		}
+
+	def bake(self):
+		#chunks are baked when they first come near the view; empty ones are remembered so they are only scanned once
+		self.empty = set()
+		self.chunkWidth = Layer.chunkSize * self.parent.tilemap.tilewidth
+		self.chunkHeight = Layer.chunkSize * self.parent.tilemap.tileheight
+
+	def bakeChunk(self, key):
+		area = (key[0] * Layer.chunkSize, key[1] * Layer.chunkSize, Layer.chunkSize, Layer.chunkSize)
+		blocks = []
+
+		for x, y, img, prop in self.parent.tilemap.getTileImages(area, self.index):
+			if not prop or not "i" in prop:
+				blocks.append(self.blocks.add(x, y, img, prop))
+
+		if not blocks:
+			self.empty.add(key)
+			return None
+
+		rect = blocks[0].position.unionall([rawBlock.position for rawBlock in blocks])
+		chunk = pygame.Surface(rect.size, pygame.SRCALPHA | pygame.HWSURFACE).convert_alpha()
+
+		for rawBlock in blocks:
+			chunk.blit(rawBlock.image, (rawBlock.position.x - rect.x, rawBlock.position.y - rect.y))
+
+		bounds = chunk.get_bounding_rect()
+
+		if not bounds.width:
+			self.empty.add(key) #fully transparent, never worth baking again
+			return None
+
+		if bounds.size != rect.size:
+			chunk = chunk.subsurface(bounds).copy()
+
+		chunk.set_alpha(255, pygame.RLEACCEL)
+
+		return chunk, (rect.x + bounds.x, rect.y + bounds.y)
+
 	def draw(self, game):
-		for x in xrange(game.viewport.rect.left / self.parent.tilemap.tilewidth, game.viewport.rect.right / self.parent.tilemap.tilewidth + 1):
-			for y in xrange(game.viewport.rect.top / self.parent.tilemap.tileheight, game.viewport.rect.bottom / self.parent.tilemap.tileheight + 1):
-				if (x, y) in self.blocks:
-					rawBlock = self.blocks[(x, y)]
-					game.screen.blit(rawBlock.image, (rawBlock.position.x - game.viewport.rect.x, rawBlock.position.y - game.viewport.rect.y))
+		view = game.viewport.rect
+		cache = self.parent.chunks
+
+		left, right = view.left // self.chunkWidth, view.right // self.chunkWidth
+		top, bottom = view.top // self.chunkHeight, view.bottom // self.chunkHeight
+
+		for x in xrange(left, right + 1):
+			for y in xrange(top, bottom + 1):
+				if not (x, y) in self.empty:
+					chunk = cache.get(self, (x, y))
+
+					if chunk:
+						game.screen.blit(chunk[0], (chunk[1][0] - view.x, chunk[1][1] - view.y))
+
+		#bake at most one chunk of the ring around the view per frame, so scrolling rarely meets an unbaked chunk;
+		#ring chunks are not drawn, so once the budget is full they would only be evicted and baked again
+		if cache.size >= cache.budget:
+			return
+
+		for x in xrange(max(0, left - 1), right + 2):
+			for y in xrange(max(0, top - 1), bottom + 2):
+				if not (x, y) in self.empty and not (self.index, (x, y)) in cache:
+					cache.get(self, (x, y))
+					return
@@ -1,6 +1,6 @@
 #!/usr/bin/env python
 
-import pygame, menu, os, sys, shutil, time
+import pygame, menu, assetpack, os, sys, shutil, time
 
 if os.path.isfile("lwupdater.exe.new"): #trigger updater rename
 	time.sleep(2)
@@ -27,7 +27,7 @@ class Main(object):
 		fps = 120
 		resolution = (1280, 720)
 
-		icon = pygame.image.load("assets/icons/icon.png")
+		icon = assetpack.default.image("assets/icons/icon.png")
 		pygame.display.set_icon(icon)
 		pygame.display.set_caption("Layer Switcher", "Layer Switcher")
 
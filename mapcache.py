@@ -0,0 +1,157 @@
+import os, marshal, struct, hashlib, array
+
+from collections import defaultdict
+from pytmx import tmxloader, pytmx
+
+class MapCache(object):
+	magic = "LSMC"
+	version = 4
+	header = struct.Struct("<4sHdQ16s")
+
+	def __init__(self, path):
+		self.path = path
+		self.cachePath = os.path.splitext(path)[0] + ".cache"
+		self.hit = False
+		self.layers = {}
+
+	def load(self, **kwargs):
+		data = self.read()
+
+		if data is None:
+			return tmxloader.load_pygame(self.path, **kwargs)
+
+		tilemap = self.restore(data["map"])
+		self.layers = data["layers"]
+		self.hit = True
+
+		tmxloader.load_images_pygame(tilemap, None, **kwargs)
+
+		return tilemap
+
+	def save(self, gMap):
+		data = {
+			"map": self.dump(gMap.tilemap),
+			"layers": dict((layer.index, layer.cacheData()) for layer in gMap.allLayers)
+		}
+
+		with open(self.path, "rb") as f:
+			digest = hashlib.md5(f.read()).digest()
+
+		stat = os.stat(self.path)
+		tmpPath = self.cachePath + ".tmp"
+
+		try:
+			with open(tmpPath, "wb") as f:
+				f.write(MapCache.header.pack(MapCache.magic, MapCache.version, stat.st_mtime, stat.st_size, digest))
+				f.write(marshal.dumps(data, 2))
+
+			if os.path.isfile(self.cachePath):
+				os.unlink(self.cachePath)
+
+			os.rename(tmpPath, self.cachePath)
+
+		except (IOError, OSError):
+			#a read-only install just keeps parsing the tmx
+			try:
+				if os.path.isfile(tmpPath):
+					os.unlink(tmpPath)
+
+			except OSError:
+				pass
+
+	def read(self):
+		if not os.path.isfile(self.cachePath):
+			return None
+
+		try:
+			with open(self.cachePath, "rb") as f:
+				magic, version, mtime, size, digest = MapCache.header.unpack(f.read(MapCache.header.size))
+
+				if magic != MapCache.magic or version != MapCache.version:
+					return None
+
+				stat = os.stat(self.path)
+				touched = stat.st_mtime != mtime or stat.st_size != size
+
+				if touched:
+					with open(self.path, "rb") as tmx:
+						if hashlib.md5(tmx.read()).digest() != digest:
+							return None
+
+				data = marshal.loads(f.read())
+
+		except (IOError, OSError, EOFError, ValueError, TypeError, struct.error):
+			return None
+
+		if touched:
+			self.restamp(stat, digest)
+
+		return data
+
+	def restamp(self, stat, digest):
+		#the tmx was copied or touched but not edited, so record its new stat and skip the hash next time
+		try:
+			with open(self.cachePath, "r+b") as f:
+				f.write(MapCache.header.pack(MapCache.magic, MapCache.version, stat.st_mtime, stat.st_size, digest))
+
+		except (IOError, OSError):
+			pass
+
+	def dump(self, tilemap):
+		attrs = self.attributes(tilemap, ("images", "tilesets", "tilelayers", "objectgroups", "layernames", "draworder"))
+		attrs["gidmap"] = dict(tilemap.gidmap)
+
+		order = dict((id(l), (True, n)) for n, l in enumerate(tilemap.tilelayers))
+		order.update((id(g), (False, n)) for n, g in enumerate(tilemap.objectgroups))
+		attrs["draworder"] = [order[id(i)] for i in tilemap.draworder]
+
+		return {
+			"attrs": attrs,
+			"tilesets": [self.attributes(t) for t in tilemap.tilesets],
+			"tilelayers": [self.dumpLayer(l) for l in tilemap.tilelayers],
+			"objectgroups": [(self.attributes(g), [self.attributes(o) for o in g]) for g in tilemap.objectgroups]
+		}
+
+	def restore(self, data):
+		tilemap = pytmx.TiledMap()
+		tilemap.__dict__.update(data["attrs"])
+		tilemap.gidmap = defaultdict(list, tilemap.gidmap)
+
+		for attrs in data["tilesets"]:
+			tilemap.tilesets.append(self.element(pytmx.TiledTileset, tilemap, attrs))
+
+		for layerData in data["tilelayers"]:
+			tilemap.addTileLayer(self.restoreLayer(tilemap, layerData))
+
+		for attrs, objects in data["objectgroups"]:
+			group = self.element(pytmx.TiledObjectGroup, tilemap, attrs)
+			group.extend(self.element(pytmx.TiledObject, tilemap, o) for o in objects)
+			tilemap.objectgroups.append(group)
+
+		tilemap.draworder = [(tilemap.tilelayers if tile else tilemap.objectgroups)[index] for tile, index in tilemap.draworder]
+
+		return tilemap
+
+	def dumpLayer(self, layer):
+		attrs = self.attributes(layer, ("data", "_positions"))
+		attrs["data"] = (layer.data.typecode, layer.data.tostring())
+
+		return attrs
+
+	def restoreLayer(self, tilemap, attrs):
+		typecode, data = attrs.pop("data")
+		layer = self.element(pytmx.TiledLayer, tilemap, attrs)
+		layer.data = array.array(typecode, data)
+		layer._positions = None
+
+		return layer
+
+	def attributes(self, element, exclude = ()):
+		return dict((k, v) for k, v in vars(element).iteritems() if k != "parent" and k not in exclude)
+
+	def element(self, cls, parent, attrs):
+		obj = cls.__new__(cls)
+		obj.__dict__.update(attrs)
+		obj.parent = parent
+
+		return obj
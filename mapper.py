@@ -1,8 +1,6 @@
-import pygame, vector, enemy, item, layer, utils
+import pygame, vector, enemy, item, layer, utils, mapcache, chunkcache, renderqueue, spatial, animation, atlas
 util = utils.Utils()
 
-from pytmx import tmxloader
-
 class Mapper(object):
 
 	def __init__(self, game, world, mapName):
@@ -11,8 +9,13 @@ class Mapper(object):
 
 		self.drawable = []
 		self.layers = []
+		self.allLayers = []
+		self.queue = renderqueue.RenderQueue()
+		self.spatial = spatial.SpatialHash(256)
+		self.chunks = chunkcache.ChunkCache(96 * 1024 * 1024)
 
-		self.tilemap = tmxloader.load_pygame("maps/%s/%s/map.tmx" % (self.world, self.mapName), pixelalpha = True)
+		self.cache = mapcache.MapCache("maps/%s/%s/map.tmx" % (self.world, self.mapName))
+		self.tilemap = self.cache.load(pixelalpha = True, image_loader = atlas.default.load)
 		self.width = self.tilemap.width * self.tilemap.tilewidth
 		self.height = self.tilemap.height * self.tilemap.tileheight
 
@@ -43,11 +46,11 @@ class Mapper(object):
 		if hasattr(self.tilemap, "bg"):
 			tmp = self.tilemap.bg.split(":")
 			if tmp[0] == "d":
-				self.background = pygame.image.load("assets/sprites/backgrounds/%s.png" % (tmp[1])).convert_alpha()
+				self.background = animation.cache.load("assets/sprites/backgrounds/%s.png" % (tmp[1]))
 			elif tmp[0] == "w":
-				self.background = pygame.image.load("maps/%s/%s.png" % (self.world, tmp[1])).convert_alpha()
+				self.background = animation.cache.load("maps/%s/%s.png" % (self.world, tmp[1]))
 			elif tmp[0] == "m":
-				self.background = pygame.image.load("maps/%s/%s/%s.png" % (self.world, self.mapName, tmp[1])).convert_alpha()
+				self.background = animation.cache.load("maps/%s/%s/%s.png" % (self.world, self.mapName, tmp[1]))
 
 			self.bgSize = self.background.get_size()
 			self.bgOffset = (0, 0)
@@ -56,10 +59,13 @@ class Mapper(object):
 			self.layerCount += 1
 
 			if rawLayer.visible:
-				layer.Layer(self, rawLayer)
+				self.allLayers.append(layer.Layer(self, rawLayer))
 					
 		self.layerCount += 1
 
+		if not self.cache.hit:
+			self.cache.save(self)
+
 		MapText.group = []
 		for i in self.layers:
 			MapText.group.append([])
@@ -129,6 +135,8 @@ class MapText(object):
 		MapText.group[tLayer].append(self)
 
 		self.surface = util.boxText(self.text, width, game.smallFont)
+		self.rect = pygame.rect.Rect(self.pos, self.surface.get_size())
 
 	def draw(self, game):
-		game.screen.blit(self.surface, self.pos - game.viewport.rect.topleft)
+		if self.rect.colliderect(game.viewport.rect):
+			game.screen.blit(self.surface, self.pos - game.viewport.rect.topleft)
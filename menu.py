@@ -1,4 +1,4 @@
-import pygame, sys, os, utils, animation, button, options, world, save, game
+import pygame, sys, utils, assetpack, animation, button, options, world, save, game, profiler
 util = utils.Utils()
 
 class Menu(object):
@@ -6,6 +6,7 @@ class Menu(object):
 	def __init__(self, screen, clock, fps, resolution, version):
 		self.screen = screen
 		self.clock = clock
+		self.profiler = profiler.Profiler()
 		self.fps = fps
 		self.resolution = resolution
 		self.halfResolution = (self.resolution[0] // 2, self.resolution[1] // 2)
@@ -28,18 +29,18 @@ class Menu(object):
 
 		self.running = True
 
-		for anim in os.listdir("assets/characters/player"):
+		for anim in assetpack.default.listdir("assets/characters/player"):
 			info = anim[:anim.find(".")].split("+")
 			if info[0] == "standingRight":
-				self.logo = animation.Animation("assets/characters/player/%s" % anim, 50, 50, float(info[1]), float(info[2]))
+				self.logo = animation.Animation(animation.Template("assets/characters/player/%s" % anim, 50, 50, float(info[1]), float(info[2])))
 				self.splice = self.logo.getSplice()
 
-		self.background = pygame.image.load("assets/sprites/backgrounds/world1.png").convert_alpha()
+		self.background = assetpack.default.image("assets/sprites/backgrounds/world1.png").convert_alpha()
 		self.bgPos = (0, 0)
 
-		self.smallFont = pygame.font.Font("assets/fonts/OpenSans-Semibold.ttf", 14)
-		self.mediumFont = pygame.font.Font("assets/fonts/OpenSans-Semibold.ttf", 30)
-		self.bigFont = pygame.font.Font("assets/fonts/OpenSans-Semibold.ttf", 72)
+		self.smallFont = pygame.font.Font(assetpack.default.open("assets/fonts/OpenSans-Semibold.ttf"), 14)
+		self.mediumFont = pygame.font.Font(assetpack.default.open("assets/fonts/OpenSans-Semibold.ttf"), 30)
+		self.bigFont = pygame.font.Font(assetpack.default.open("assets/fonts/OpenSans-Semibold.ttf"), 72)
 
 		self.mainText = self.bigFont.render("Layer Switcher", 1, (0, 0, 0))
 		self.versionText = self.mediumFont.render(self.version, 1, (0, 0, 0))
@@ -51,10 +52,13 @@ class Menu(object):
 		while self.running:
 			dt = self.clock.tick(self.fps)
 			pygame.display.set_caption("Layer Switcher %3d FPS" % (self.clock.get_fps()), "Layer Switcher")
+			self.profiler.begin()
 
 			mouseTrigger = False
 
 			for event in pygame.event.get():
+				self.profiler.handle(event)
+
 				if event.type == pygame.QUIT:
 					self.leave()
 
@@ -90,6 +94,7 @@ class Menu(object):
 					if event.button == 1:
 						mouseTrigger = True
 
+			self.profiler.mark("events")
 			self.screen.fill((82, 246, 255))
 
 			mPos = pygame.mouse.get_pos()
@@ -105,12 +110,19 @@ class Menu(object):
 
 			if self.currentMenu == "main":
 				self.logo.update(dt * 0.001)
+				self.splice = self.logo.getSplice()
 				self.screen.blit(self.splice, (self.halfResolution[0] - self.splice.get_width() // 2, 270))
 
 			for butt in button.Button.group:
 				butt.updateAndDraw(self.screen, mPos, mouseTrigger)
 
+			self.profiler.mark("draw")
+			self.profiler.draw(self.screen, self.smallFont)
+			self.profiler.mark("overlay")
+
 			pygame.display.flip()
+			self.profiler.mark("flip")
+			self.profiler.end()
 
 	def mainMenu(self):
 		self.currentMenu = "main"
@@ -137,5 +149,6 @@ class Menu(object):
 
 	def leave(self):
 		self.running = False
+		self.profiler.stopTrace()
 		pygame.quit()
 		sys.exit(0)
@@ -1,24 +1,29 @@
-import pygame, random
+import pygame, random, array
+
+rng = random.Random()
 
 class Particles(object):
-	groups = []
+	images = {}
 
 	def __init__(self, rate, lifeTime, color, position, size):
-		self.img = pygame.Surface((5, 5), pygame.SRCALPHA | pygame.HWSURFACE)
-		self.img.fill(color)
-		self.img.convert_alpha()
+		if color not in Particles.images:
+			img = pygame.Surface((5, 5), pygame.SRCALPHA | pygame.HWSURFACE)
+			img.fill(color)
+			Particles.images[color] = img
+
+		self.img = Particles.images[color]
+		self.halfSize = (self.img.get_width() / 2, self.img.get_height() / 2)
 
 		self.rate = 1 / float(rate)
 		self.emitDelay = 0
 		self.lifeTime = lifeTime
 		self.position = pygame.rect.Rect(position, size)
-		self.rect = pygame.rect.Rect(position, size)
-		self.list = []
-
-		Particles.groups.append(self)
 
 	def add(self, layer):
-		self.list.append(Particle(self, layer))
+		x = rng.randint(self.position.left, self.position.right)
+		y = rng.randint(self.position.top, self.position.bottom)
+
+		pool.add(layer, self.img, x - self.halfSize[0], y - self.halfSize[1], self.lifeTime)
 
 	def emit(self, dt, layer):
 		self.emitDelay = min(self.rate, self.emitDelay + dt)
@@ -27,34 +32,78 @@ class Particles(object):
 			self.emitDelay = 0
 			self.add(layer)
 
-	def setOffset(self, pos):
-		self.rect.topleft = pos
-
 	def update(self, game, position):
 		self.position.topleft = position
 
-		for p in self.list:
-			if p.update(game.dt * 0.001):
-				self.list.remove(p)
+class Ring(object):
 
-	def draw(self, game, layer):
-		for p in self.list:
-			if p.layer == layer:
-				game.screen.blit(self.img, (p.position.x - self.rect.x, p.position.y - self.rect.y))
+	def __init__(self, capacity):
+		self.capacity = capacity
+		self.x = array.array("i", [0]) * capacity
+		self.y = array.array("i", [0]) * capacity
+		self.expires = array.array("d", [0]) * capacity
+		self.images = [None] * capacity
+		self.head = 0
+		self.count = 0
+
+	def add(self, img, x, y, expires):
+		if self.count == self.capacity: #full, drop the oldest
+			self.head = (self.head + 1) % self.capacity
+			self.count -= 1
+
+		i = (self.head + self.count) % self.capacity
+		self.x[i] = x
+		self.y[i] = y
+		self.expires[i] = expires
+		self.images[i] = img
+		self.count += 1
+
+	def cull(self, now):
+		#particles mostly share a lifetime, so the expired ones sit at the head
+		while self.count and self.expires[self.head] <= now:
+			self.images[self.head] = None
+			self.head = (self.head + 1) % self.capacity
+			self.count -= 1
+
+	def indices(self):
+		end = self.head + self.count
 
-class Particle(object):
+		if end <= self.capacity:
+			return xrange(self.head, end)
 
-	def __init__(self, group, layer):
-		pos_x = random.randint(group.position.left, group.position.right)
-		pos_y = random.randint(group.position.top, group.position.bottom)
-		self.position = pygame.rect.Rect((pos_x - group.img.get_width() / 2, pos_y - group.img.get_height() / 2), group.img.get_size())
-		self.layer = layer
+		return range(self.head, self.capacity) + range(0, end - self.capacity)
 
-		self.group = group
-		self.life = 0
+	def draw(self, screen, view, now):
+		x, y, expires, images = self.x, self.y, self.expires, self.images
+		ox, oy = view.topleft
+		left, top, right, bottom = view.left - 5, view.top - 5, view.right, view.bottom
 
-	def update(self, dt):
-		self.life = min(self.group.lifeTime, self.life + dt)
+		screen.blits([(images[i], (x[i] - ox, y[i] - oy)) for i in self.indices() if expires[i] > now and left < x[i] < right and top < y[i] < bottom], False)
+
+class Pool(object):
+	capacity = 2048
+
+	def __init__(self):
+		self.clear()
+
+	def clear(self):
+		self.rings = {}
+		self.time = 0.
+
+	def add(self, layer, img, x, y, lifeTime):
+		if layer not in self.rings:
+			self.rings[layer] = Ring(Pool.capacity)
+
+		self.rings[layer].add(img, x, y, self.time + lifeTime)
+
+	def age(self, dt):
+		self.time += dt
+
+		for ring in self.rings.itervalues():
+			ring.cull(self.time)
+
+	def draw(self, game, layer):
+		if layer in self.rings and self.rings[layer].count:
+			self.rings[layer].draw(game.screen, game.viewport.rect, self.time)
 
-		if self.life == self.group.lifeTime:
-			return True
+pool = Pool()
@@ -3,10 +3,14 @@ import pygame, character, enemy, item
 from vector import Vec2d as Vector
 
 class Player(character.Character):
+	drawOrder = 2
 
 	def __init__(self, game):
 		super(Player, self).__init__(game, game.map, "player", Vector(0, 0), 0)
 
+		self.input = None
+		self.recorder = None
+
 	def spawn(self):
 		super(Player, self).spawn()
 
@@ -41,6 +45,17 @@ class Player(character.Character):
 		self.isDead = False
 
 	def update(self, game, dt):
+		if self.input:
+			self.input.poll(game, self)
+		else:
+			keys = pygame.key.get_pressed()
+
+			self.movingLeft = keys[pygame.K_a]
+			self.movingRight = keys[pygame.K_d]
+
+		if self.recorder:
+			self.recorder.capture(self)
+
 		if self.key_w:
 			self.key_w = False
 			self.toBack(game)
@@ -49,11 +64,6 @@ class Player(character.Character):
 			self.key_s = False
 			self.toFront(game)
 
-		keys = pygame.key.get_pressed()
-
-		self.movingLeft = keys[pygame.K_a]
-		self.movingRight = keys[pygame.K_d]
-
 		if self.spaced:
 			self.spaced = False
 			self.holdJump = True
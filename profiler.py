@@ -0,0 +1,138 @@
+import pygame, collections, json, os, time
+from timeit import default_timer as clock
+
+class Profiler(object):
+	history = 240
+	refresh = 30
+	graphSize = (240, 80)
+	scale = 2 #pixels per millisecond in the graph
+
+	def __init__(self):
+		self.overlay = False
+		self.tracing = False
+		self.frames = collections.deque(maxlen = Profiler.history)
+		self.phases = collections.OrderedDict()
+		self.totals = collections.OrderedDict()
+		self.counted = 0
+		self.rendered = []
+		self.events = []
+		self.origin = clock()
+		self.frameStart = 0
+		self.lastMark = 0
+
+	def begin(self):
+		if not self.overlay and not self.tracing:
+			return
+
+		self.frameStart = self.lastMark = clock()
+		self.phases.clear()
+
+	def mark(self, name):
+		if not self.frameStart:
+			return
+
+		now = clock()
+		self.phases[name] = self.phases.get(name, 0) + now - self.lastMark
+
+		if self.tracing:
+			self.events.append((name, self.lastMark, now - self.lastMark))
+
+		self.lastMark = now
+
+	def end(self):
+		if not self.frameStart:
+			return
+
+		now = clock()
+		self.frames.append((now - self.frameStart) * 1000)
+
+		if self.tracing:
+			self.events.append(("frame", self.frameStart, now - self.frameStart))
+
+		for name, spent in self.phases.iteritems():
+			self.totals[name] = self.totals.get(name, 0) + spent
+
+		self.counted += 1
+		self.frameStart = 0
+
+	def handle(self, event):
+		if event.type != pygame.KEYDOWN:
+			return
+
+		if event.key == pygame.K_F3:
+			self.overlay = not self.overlay
+
+		if event.key == pygame.K_F4:
+			if self.tracing:
+				self.stopTrace()
+			else:
+				self.startTrace()
+
+	def startTrace(self):
+		self.tracing = True
+		self.events = []
+
+	def stopTrace(self, directory = "traces"):
+		if not self.tracing:
+			return None
+
+		self.tracing = False
+
+		if not os.path.isdir(directory):
+			os.makedirs(directory)
+
+		path = os.path.join(directory, time.strftime("trace-%Y%m%d-%H%M%S.json"))
+
+		with open(path, "w") as f:
+			json.dump({"traceEvents": [{
+				"name": name,
+				"ph": "X",
+				"ts": int((start - self.origin) * 1000000),
+				"dur": int(duration * 1000000),
+				"pid": 1,
+				"tid": 0 if name == "frame" else 1
+			} for name, start, duration in self.events], "displayTimeUnit": "ms"}, f)
+
+		self.events = []
+
+		return path
+
+	def draw(self, screen, font):
+		if not self.overlay:
+			return
+
+		width, height = Profiler.graphSize
+		left = screen.get_width() - width - 10
+
+		if self.counted >= Profiler.refresh or not self.rendered:
+			lines = ["%-12s %6.2fms" % (name, spent * 1000 / max(1, self.counted)) for name, spent in self.totals.iteritems()]
+
+			if self.frames:
+				lines.insert(0, "frame %.2fms, max %.2fms" % (sum(self.frames) / len(self.frames), max(self.frames)))
+
+			if self.tracing:
+				lines.append("tracing (F4 to stop)")
+
+			self.rendered = [font.render(line, 1, (255, 255, 255)) for line in lines]
+			self.totals.clear()
+			self.counted = 0
+
+		panel = pygame.Surface((width, height + 5 + 18 * len(self.rendered)), pygame.SRCALPHA)
+		panel.fill((0, 0, 0, 160))
+
+		for budget, color in ((1000 / 120., (0, 200, 0)), (1000 / 60., (230, 200, 0)), (1000 / 30., (230, 0, 0))):
+			y = height - int(budget * Profiler.scale)
+
+			if y >= 0:
+				pygame.draw.line(panel, color, (0, y), (width - 1, y))
+
+		offset = width - len(self.frames)
+
+		for x, spent in enumerate(self.frames):
+			top = max(0, height - int(spent * Profiler.scale))
+			pygame.draw.line(panel, (255, 255, 255), (offset + x, height - 1), (offset + x, top))
+
+		for i, line in enumerate(self.rendered):
+			panel.blit(line, (5, height + 5 + 18 * i))
+
+		screen.blit(panel, (left, 10))
@@ -9,3 +9,9 @@ GID_TRANS_FLIPX = 1<<31
 GID_TRANS_FLIPY = 1<<30
 GID_TRANS_ROT   = 1<<29
 
+
+
+# array typecode holding an unsigned 32-bit gid ("L" is 64-bit on some
+# platforms)
+import array as _array
+GID_TYPECODE = [ c for c in "IL" if _array.array(c).itemsize == 4 ][0]
@@ -1,4 +1,4 @@
-from itertools import chain, product
+from itertools import chain
 from xml.etree import ElementTree
 from collections import defaultdict
 from utils import decode_gid, types, parse_properties, read_points
@@ -52,6 +52,7 @@ class TiledMap(TiledElement):
         self.tilesets = []          # list of TiledTileset objects
         self.tilelayers   = []      # list of TiledLayer objects
         self.objectgroups = []      # list of TiledObjectGroup objects
+        self.draworder = []         # layers and objectgroups in file order
         self.tile_properties = {}   # dict of tiles that have metadata
         self.filename = filename
 
@@ -92,7 +93,7 @@ class TiledMap(TiledElement):
         """
 
         try:
-            gid = self.tilelayers[int(layer)].data[int(y)][int(x)]
+            gid = self.tilelayers[int(layer)].getGID(int(x), int(y))
         except (IndexError, ValueError):
             msg = "Coords: ({0},{1}) in layer {2} is not valid."
             raise Exception, msg.format(x, y, layer)
@@ -115,7 +116,7 @@ class TiledMap(TiledElement):
         """
 
         try:
-            return self.tilelayers[int(layer)].data[int(y)][int(x)]
+            return self.tilelayers[int(layer)].getGID(int(x), int(y))
         except (IndexError, ValueError):
             msg = "Coords: ({0},{1}) in layer {2} is invalid"
             raise Exception, msg.format(x, y, layer)
@@ -130,18 +131,55 @@ class TiledMap(TiledElement):
         from tiled
         """
 
-        raise NotImplementedError
+        return [ i for i in self.draworder if getattr(i, "visible", True) ]
 
 
     def getTileImages(self, r, layer):
         """
         return a group of tiles in an area
-        expects a pygame rect or rect-like list/tuple
+        expects a pygame rect or rect-like list/tuple in tile coordinates
+
+        returns a list of (x, y, image, properties) for every tile in the
+        area that is not empty.  properties will be None if the tile has none.
+        the area is clipped to the map.
 
         useful if you don't want to repeatedly call getTileImage
         """
 
-        raise NotImplementedError
+        try:
+            tilelayer = self.tilelayers[int(layer)]
+        except (IndexError, ValueError):
+            msg = "Layer {0} does not exist."
+            raise ValueError, msg.format(layer)
+
+        try:
+            x, y, w, h = [ int(i) for i in r ]
+        except (TypeError, ValueError):
+            msg = "Area must be a rect-like (x, y, width, height).  Got {0}."
+            raise ValueError, msg.format(r)
+
+        left, top = max(0, x), max(0, y)
+        right = min(tilelayer.width, x + w)
+        bottom = min(tilelayer.height, y + h)
+
+        data = tilelayer.data
+        width = tilelayer.width
+        images = self.images
+        props = self.tile_properties.get
+
+        tiles = []
+        for ty in xrange(top, bottom):
+            row = ty * width
+            for tx in xrange(left, right):
+                gid = data[row + tx]
+                if gid:
+                    try:
+                        tiles.append((tx, ty, images[gid], props(gid)))
+                    except IndexError:
+                        msg = "Coords: ({0},{1}) in layer {2} has invalid GID: {3}"
+                        raise Exception, msg.format(tx, ty, layer, gid)
+
+        return tiles
 
 
     def getObjects(self):
@@ -161,7 +199,7 @@ class TiledMap(TiledElement):
         """
 
         try:
-            gid = self.tilelayers[int(layer)].data[int(y)][int(x)]
+            gid = self.tilelayers[int(layer)].getGID(int(x), int(y))
         except (IndexError, ValueError):
             msg = "Coords: ({0},{1}) in layer {2} is invalid."
             raise Exception, msg.format(x, y, layer)
@@ -180,9 +218,9 @@ class TiledMap(TiledElement):
         """
         Return the data for a layer.
 
-        Data is an array of arrays.
+        Data is a single array of internal GIDs, stored row by row.
 
-        >>> pos = data[y][x]
+        >>> pos = data[y * width + x]
         """
 
         try:
@@ -193,14 +231,42 @@ class TiledMap(TiledElement):
 
 
     def getTileLocation(self, gid):
-        # experimental way to find locations of a tile by the GID
+        """
+        return a list of (x, y, layer) for every place the GID is used,
+        ordered by x, then y, then layer.
+        """
+
+        return sorted((x, y, l) for l, layer in enumerate(self.tilelayers)
+                      for (x, y) in layer.positions.get(gid, ()))
+
+
+    def getTileLocationsByProperty(self, name, layer):
+        """
+        return a list of (x, y) for every tile in the layer that has a
+        property called name, ordered by x, then y.
+        """
 
-        p = product(xrange(self.width),
-                    xrange(self.height),
-                    xrange(len(self.tilelayers)))
+        try:
+            positions = self.tilelayers[int(layer)].positions
+        except (IndexError, ValueError):
+            msg = "Layer {0} does not exist."
+            raise ValueError, msg.format(layer)
+
+        return sorted(chain(*(positions[gid] for gid in positions
+                              if name in self.tile_properties.get(gid, ()))))
+
+
+    def setTileGID(self, x, y, layer, gid):
+        """
+        change the internal GID of a tile in this location
+        x and y must be integers and are in tile coordinates, not pixel
+        """
 
-        return [ (x,y,l) for (x,y,l) in p
-               if self.tilelayers[l].data[y][x] == gid ]
+        try:
+            self.tilelayers[int(layer)].setGID(int(x), int(y), int(gid))
+        except (IndexError, ValueError):
+            msg = "Coords: ({0},{1}) in layer {2} is invalid"
+            raise Exception, msg.format(x, y, layer)
 
 
     def getTilePropertiesByGID(self, gid):
@@ -234,8 +300,7 @@ class TiledMap(TiledElement):
             msg = "Layer must be an integer.  Got {0} instead."
             raise ValueError, msg.format(type(layer))
 
-        p = product(range(self.width),range(self.height))
-        layergids = set( self.tilelayers[layer].data[y][x] for x, y in p )
+        layergids = self.tilelayers[layer].positions.keys()
 
         props = []
         for gid in layergids:
@@ -309,6 +374,13 @@ class TiledMap(TiledElement):
         for node in etree.findall('tileset'):
             self.tilesets.append(TiledTileset(self, node))
 
+        # remember the order that tiled stores layers and objectgroups in,
+        # since that is the order they are drawn in
+        layers, groups = iter(self.tilelayers), iter(self.objectgroups)
+        self.draworder = [ next(layers) if node.tag == 'layer' else next(groups)
+                           for node in etree
+                           if node.tag in ('layer', 'objectgroup') ]
+
         # "tile objects", objects with a GID, have need to have their
         # attributes set after the tileset is loaded
         for o in self.getObjects():
@@ -437,12 +509,13 @@ class TiledTileset(TiledElement):
 
 
 class TiledLayer(TiledElement):
-    reserved = "name x y width height opacity properties data".split()
+    reserved = "name x y width height opacity properties data positions".split()
 
     def __init__(self, parent, node):
         TiledElement.__init__(self)
         self.parent = parent
-        self.data = []
+        self.data = None
+        self._positions = None  # gid -> set of (x, y) where it is used
 
         # defaults from the specification
         self.name = None
@@ -456,13 +529,77 @@ class TiledLayer(TiledElement):
         return "<{0}: \"{1}\">".format(self.__class__.__name__, self.name)
 
 
+    @property
+    def positions(self):
+        """
+        the index of positions each GID is used at, built on first use
+        """
+
+        if self._positions is None:
+            self.buildPositions()
+
+        return self._positions
+
+
+    def getGID(self, x, y):
+        """
+        return the internal GID at x, y in tile coordinates
+
+        raises IndexError if the coords are outside the layer
+        """
+
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.data[y * self.width + x]
+
+        raise IndexError
+
+
+    def setGID(self, x, y, gid):
+        """
+        set the internal GID at x, y in tile coordinates, keeping the
+        positions index current
+
+        raises IndexError if the coords are outside the layer
+        """
+        from utils import smallest_typecode
+        import array
+
+        old = self.getGID(x, y)
+        if old == gid:
+            return
+
+        if gid >= 1 << (8 * self.data.itemsize):
+            self.data = array.array(smallest_typecode(gid), self.data)
+
+        self.data[y * self.width + x] = gid
+
+        if old:
+            self.positions[old].discard((x, y))
+            if not self.positions[old]:
+                del self.positions[old]
+
+        if gid:
+            self.positions.setdefault(gid, set()).add((x, y))
+
+
+    def buildPositions(self):
+        """
+        rebuild the index of positions each GID is used at
+        """
+
+        self._positions = {}
+        width = self.width
+        for i, gid in enumerate(self.data):
+            if gid:
+                self._positions.setdefault(gid, set()).add((i % width, i // width))
+
+
     def parse(self, node):
         """
         parse a layer element
         """
-        from utils import group
-        from itertools import product, imap
-        from struct import unpack
+        from itertools import imap
+        from utils import gid_array, smallest_typecode
         import array
 
         self.set_properties(node)
@@ -512,18 +649,25 @@ class TiledLayer(TiledElement):
 
             next_gid = get_children(data_node)
 
-        elif data:
-            # data is a list of gids. cast as 32-bit ints to format properly
-            # create iterator to efficiently parse data
-            next_gid=imap(lambda i:unpack("<L", "".join(i))[0], group(data, 4))
-
-        # using bytes here limits the layer to 256 unique tiles
-        # may be a limitation for very detailed maps, but most maps are not
-        # so detailed.
-        [ self.data.append(array.array("B")) for i in xrange(self.height) ]
-
-        for (y, x) in product(xrange(self.height), xrange(self.width)):
-            self.data[y].append(self.parent.registerGID(*decode_gid(next(next_gid))))
+        # data is a list of little-endian 32-bit gids.  read the whole
+        # buffer in one go instead of unpacking it 4 bytes at a time
+        raw_gids = gid_array(data if data is not None else next_gid)
+
+        if len(raw_gids) != self.width * self.height:
+            msg = "Layer \"{0}\" has {1} tiles, expected {2}."
+            raise Exception, msg.format(self.name, len(raw_gids),
+                                        self.width * self.height)
+
+        # flags only need to be decoded once per distinct gid, then every
+        # cell is mapped to its internal gid through the lookup table
+        lut = dict((raw_gid, self.parent.registerGID(*decode_gid(raw_gid)))
+                   for raw_gid in sorted(set(raw_gids)))
+
+        # the layer is kept as one contiguous array, row by row, using the
+        # smallest item size that fits the highest gid it references
+        typecode = smallest_typecode(max(lut.itervalues()))
+        self.data = array.array(typecode, imap(lut.__getitem__, raw_gids))
+        self._positions = None
 
 
 class TiledObjectGroup(TiledElement, list):
@@ -288,6 +288,7 @@ def load_images_pygame(tmxdata, mapping, *args, **kwargs):
 
 
     pixelalpha     = kwargs.get("pixelalpha", False)
+    image_loader   = kwargs.get("image_loader", pygame.image.load)
     force_colorkey = kwargs.get("force_colorkey", False)
     force_bitdepth = kwargs.get("depth", False)
 
@@ -303,7 +304,7 @@ def load_images_pygame(tmxdata, mapping, *args, **kwargs):
     for firstgid, t in sorted((t.firstgid, t) for t in tmxdata.tilesets):
         path = os.path.join(os.path.dirname(tmxdata.filename), t.source)
 
-        image = pygame.image.load(path)
+        image = image_loader(path)
 
         w, h = image.get_size()
         tile_size = (t.tilewidth, t.tileheight)
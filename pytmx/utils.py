@@ -1,6 +1,8 @@
 from pygame import Rect
-from itertools import tee, islice, izip, product
+from itertools import tee, islice, izip
 from collections import defaultdict
+from array import array
+from sys import byteorder
 from constants import *
 
 
@@ -47,6 +49,34 @@ def decode_gid(raw_gid):
     return gid, flags
 
 
+def gid_array(data):
+    # return an array of raw 32-bit gids, either read straight from a buffer
+    # of little-endian bytes or built from an iterable of ints
+
+    gids = array(GID_TYPECODE)
+
+    if isinstance(data, str):
+        gids.fromstring(data)
+        if byteorder == "big":
+            gids.byteswap()
+    else:
+        gids.extend(data)
+
+    return gids
+
+
+def smallest_typecode(maxvalue):
+    # return the array typecode with the smallest item size that can hold
+    # every value up to maxvalue
+
+    if maxvalue < 1 << 8:
+        return "B"
+    elif maxvalue < 1 << 16:
+        return "H"
+
+    return GID_TYPECODE
+
+
 def handle_bool(text):
     # properly convert strings to a bool
     try:
@@ -143,7 +173,7 @@ def buildDistributionRects(tmxmap, layer, tileset=None, real_gid=None):
 
 
     if isinstance(layer, int):
-        layer_data = tmxmap.getLayerData(layer).data
+        layer_data = tmxmap.getLayerData(layer)
     elif isinstance(layer, str):
         try:
             layer = [ l for l in tmxmap.tilelayers if l.name == layer ].pop()
@@ -152,26 +182,17 @@ def buildDistributionRects(tmxmap, layer, tileset=None, real_gid=None):
             msg = "Layer \"{0}\" not found in map {1}."
             raise ValueError, msg.format(layer, tmxmap)
 
-    p = product(xrange(tmxmap.width), xrange(tmxmap.height))
-    if gid:
-        points = [ (x,y) for (x,y) in p if layer_data[y][x] == gid ]
-    else:
-        points = [ (x,y) for (x,y) in p if layer_data[y][x] ]
+    width = tmxmap.width
+    cells = dict(((i % width, i // width), True)
+                 for i, g in enumerate(layer_data) if (g == gid if gid else g))
 
-    rects = simplify(points, tmxmap.tilewidth, tmxmap.tileheight)
-    return rects
+    return [ Rect(x*tmxmap.tilewidth, y*tmxmap.tileheight,
+                  w*tmxmap.tilewidth, h*tmxmap.tileheight)
+             for x, y, w, h, value in merge_cells(cells, width, tmxmap.height) ]
 
 
 def simplify(all_points, tilewidth, tileheight):
     """
-    kludge:
-
-    "A kludge (or kluge) is a workaround, a quick-and-dirty solution,
-    a clumsy or inelegant, yet effective, solution to a problem, typically
-    using parts that are cobbled together."
-
-    -- wikipedia
-
     turn a list of points into a rects
     adjacent rects will be combined.
 
@@ -201,50 +222,62 @@ def simplify(all_points, tilewidth, tileheight):
         pretty cool, right?
 
     there may be cases where the number of rectangles is not as low as possible,
-    but I haven't found that it is excessively bad.  certainly much better than
-    making a list of rects, one for each tile on the map!
+    but it is certainly much better than making a list of rects, one for each
+    tile on the map!
 
     """
 
-    def pick_rect(points, rects):
-        ox, oy = sorted([ (sum(p), p) for p in points ])[0][1]
-        x = ox
-        y = oy
-        ex = None
+    if not all_points:
+        return []
 
-        while 1:
-            x += 1
-            if not (x, y) in points:
-                if ex is None:
-                    ex = x - 1
+    width = max(x for x, y in all_points) + 1
+    height = max(y for x, y in all_points) + 1
+    cells = dict.fromkeys(all_points, True)
 
-                if ((ox, y+1) in points):
-                    if x == ex + 1 :
-                        y += 1
-                        x = ox
+    return [ Rect(x*tilewidth, y*tileheight, w*tilewidth, h*tileheight)
+             for x, y, w, h, value in merge_cells(cells, width, height) ]
 
-                    else:
-                        y -= 1
-                        break
-                else:
-                    if x <= ex: y-= 1
-                    break
 
-        c_rect = Rect(ox*tilewidth,oy*tileheight,\
-                     (ex-ox+1)*tilewidth,(y-oy+1)*tileheight)
+def merge_cells(cells, width, height, axes=None):
+    """
+    greedily merge a grid of cells into rects, in time linear to the grid.
+
+    cells is a dict of (x, y) -> value.  only neighbours with equal values
+    are merged, and value must not be None.  returns a list of
+    (x, y, width, height, value) in tile coordinates.
 
-        rects.append(c_rect)
+    axes, if given, is called with a value and returns (across, down):
+    whether cells with that value may merge along a row and down a column.
 
-        rect = Rect(ox,oy,ex-ox+1,y-oy+1)
-        kill = [ p for p in points if rect.collidepoint(p) ]
-        [ points.remove(i) for i in kill ]
+    the grid is scanned row by row.  the first unmerged cell grows as far
+    right as it can, then the whole run grows down while every cell under it
+    matches.  every cell is merged exactly once and each failed row check is
+    bounded by the width of the rect it ends, so the work stays linear.
+    """
 
-        if points:
-            pick_rect(points, rects)
+    remaining = dict(cells)
+    rects = []
 
-    rect_list = []
-    while all_points:
-        pick_rect(all_points, rect_list)
+    for y in xrange(height):
+        for x in xrange(width):
+            value = remaining.get((x, y))
+            if value is None:
+                continue
 
-    return rect_list
+            across, down = axes(value) if axes else (True, True)
 
+            w = 1
+            while across and remaining.get((x + w, y)) == value:
+                w += 1
+
+            h = 1
+            while down and all(remaining.get((x + i, y + h)) == value for i in xrange(w)):
+                h += 1
+
+            for j in xrange(h):
+                for i in xrange(w):
+                    del remaining[(x + i, y + j)]
+
+            rects.append((x, y, w, h, value))
+
+    return rects
@@ -0,0 +1,30 @@
+import bisect
+
+class RenderQueue(object):
+
+	def __init__(self):
+		self.buckets = {}
+		self.serial = 0
+
+	def move(self, entity, old, new):
+		if old is not None and old in self.buckets:
+			bucket = self.buckets[old]
+			index = bisect.bisect_left(bucket, (entity.drawKey,))
+
+			if index < len(bucket) and bucket[index][1] is entity:
+				del bucket[index]
+
+		if not hasattr(entity, "drawKey"):
+			#items draw under enemies and enemies under the player, each in load order
+			entity.drawKey = (entity.drawOrder, self.serial)
+			self.serial += 1
+
+		bisect.insort(self.buckets.setdefault(new, []), (entity.drawKey, entity))
+
+	def draw(self, game, layer, visible):
+		if layer in self.buckets:
+			for key, entity in self.buckets[layer]:
+				if entity in visible:
+					entity.draw(game)
+				else:
+					entity.shadowPos = None #recomputed from scratch when it comes back into view
@@ -0,0 +1,139 @@
+import struct, base64
+
+LEFT = 1
+RIGHT = 2
+BACK = 4
+FRONT = 8
+JUMP = 16
+HOLD = 32
+
+magic = "LSRP"
+version = 1
+header = struct.Struct("<4sBII")
+
+def capture(player):
+	mask = 0
+
+	if player.movingLeft:
+		mask |= LEFT
+	if player.movingRight:
+		mask |= RIGHT
+	if player.key_w:
+		mask |= BACK
+	if player.key_s:
+		mask |= FRONT
+	if player.spaced:
+		mask |= JUMP
+	if player.holdJump:
+		mask |= HOLD
+
+	return mask
+
+def apply(player, mask):
+	player.movingLeft = bool(mask & LEFT)
+	player.movingRight = bool(mask & RIGHT)
+	player.key_w = bool(mask & BACK)
+	player.key_s = bool(mask & FRONT)
+	player.spaced = bool(mask & JUMP)
+	player.holdJump = bool(mask & HOLD)
+
+def writeVarint(out, value):
+	while value > 0x7f:
+		out.append(value & 0x7f | 0x80)
+		value >>= 7
+
+	out.append(value)
+
+def readVarint(data, offset):
+	value = 0
+	shift = 0
+
+	while True:
+		byte = data[offset]
+		offset += 1
+		value |= (byte & 0x7f) << shift
+		shift += 7
+
+		if byte < 0x80:
+			return value, offset
+
+class Recorder(object):
+
+	def __init__(self, seed):
+		self.seed = seed
+		self.ticks = 0
+		self.runs = []
+		self.mask = 0
+		self.run = 0
+
+	def capture(self, player):
+		mask = capture(player)
+
+		if mask != self.mask and self.run:
+			self.runs.append((self.run, self.mask))
+			self.run = 0
+
+		self.mask = mask
+		self.run += 1
+		self.ticks += 1
+
+	def encode(self):
+		out = bytearray(header.pack(magic, version, self.seed, self.ticks))
+		previous = 0
+
+		for run, mask in self.runs + [(self.run, self.mask)]:
+			if run:
+				out.append(mask ^ previous)
+				writeVarint(out, run)
+				previous = mask
+
+		return str(out)
+
+	def toString(self):
+		return base64.b64encode(self.encode())
+
+class Replay(object):
+
+	def __init__(self, data):
+		if len(data) < header.size:
+			raise ValueError("replay too short")
+
+		fileMagic, fileVersion, self.seed, self.ticks = header.unpack_from(data)
+
+		if fileMagic != magic or fileVersion != version:
+			raise ValueError("not a replay or unsupported version")
+
+		data = bytearray(data)
+		offset = header.size
+		mask = 0
+		self.runs = []
+
+		while offset < len(data):
+			mask ^= data[offset]
+			run, offset = readVarint(data, offset + 1)
+			self.runs.append((run, mask))
+
+		self.index = 0
+		self.left = self.runs[0][0] if self.runs else 0
+		self.done = not self.runs
+
+	@staticmethod
+	def fromString(text):
+		return Replay(base64.b64decode(text))
+
+	def poll(self, game, player):
+		if self.done:
+			apply(player, 0)
+			return
+
+		apply(player, self.runs[self.index][1])
+
+		self.left -= 1
+
+		if self.left == 0:
+			self.index += 1
+
+			if self.index < len(self.runs):
+				self.left = self.runs[self.index][0]
+			else:
+				self.done = True
@@ -0,0 +1,24 @@
+import enemy
+
+from operator import attrgetter
+
+class Scheduler(object):
+
+	def __init__(self, game):
+		#enemies this far from the player keep simulating; anything further out sleeps where it is
+		self.reach = (game.resolution[0] * 2, game.resolution[1] * 2)
+		self.awake = []
+
+	def update(self, game):
+		area = game.player.position.inflate(self.reach)
+		near = [gEnemy for gEnemy in game.map.spatial.query(area) if isinstance(gEnemy, enemy.Enemy)]
+		near.sort(key = attrgetter("serial"))
+
+		woken = set(near).difference(self.awake)
+
+		for gEnemy in woken:
+			gEnemy.nextThink = game.ticks
+
+		self.awake = near
+
+		return self.awake
@@ -1,5 +1,5 @@
 from distutils.core import setup
-import os, shutil, glob, fnmatch, py2exe, sys, json, hashlib
+import os, shutil, glob, fnmatch, py2exe, sys, json, hashlib, atlas, assetpack
 
 f = open("metadata", "w")
 
@@ -43,6 +43,10 @@ def isSystemDLL(pathname):
 	return origIsSystemDLL(pathname)
 py2exe.build_exe.isSystemDLL = isSystemDLL
 
+generated = os.path.join("maps", "Game", "Stress") #written by stressmap.py for benchmarks, not shipped
+transient = (".cache", ".tmp") #map caches are rebuilt on each player's machine
+external = ("assets/fonts/", "assets/icons/", "assets/music/", "assets/sprites/menuBig.png") #read straight from disk by the updater and the music stream
+
 dist_dir = os.path.join("layerswitcher")
 data_dir = dist_dir
 
@@ -64,8 +68,18 @@ setup(
 	windows = [Game, Updater],
 )
 
+print "packed %d images into %d atlas pages" % atlas.build()
+packed = assetpack.build(skip = atlas.index())
+print "packed %d files into assets.pack" % len(packed)
+
+def shipped(dirpath, fn):
+	name = assetpack.key(os.path.join(dirpath, fn))
+
+	return not fn.endswith(transient) and (name not in packed or name.startswith(external))
+
 data = []
 for dirpath, dirnames, filenames in os.walk("assets"):
+	filenames = [fn for fn in filenames if shipped(dirpath, fn)]
 	data.extend(os.path.join(dirpath, fn) for fn in filenames)
 
 	metadata["files"][dirpath] = {}
@@ -74,6 +88,11 @@ for dirpath, dirnames, filenames in os.walk("assets"):
 		metadata["files"][dirpath][fn] = hashfile(open(os.path.join(dirpath, fn), "rb"))
 
 for dirpath, dirnames, filenames in os.walk("maps"):
+	if os.path.normpath(dirpath) == generated:
+		del dirnames[:]
+		continue
+
+	filenames = [fn for fn in filenames if shipped(dirpath, fn)]
 	data.extend(os.path.join(dirpath, fn) for fn in filenames)
 
 	metadata["files"][dirpath] = {}
@@ -84,6 +103,7 @@ for dirpath, dirnames, filenames in os.walk("maps"):
 os.makedirs(data_dir + "/data")
 data.extend(["version.dat"])
 data.extend(["updater.dat"])
+data.extend(["assets.pack"])
 
 dest = data_dir
 for fname in data:
@@ -91,12 +111,12 @@ for fname in data:
 	if not os.path.exists(os.path.dirname(dname)):
 		os.makedirs(os.path.dirname(dname))
 	if not os.path.isdir(fname):
-		shutil.copy(fname, dname)
+		shutil.copy2(fname, dname)
 
 metadata["files"]["layerswitcher"] = {}
 
 for fn in os.listdir("layerswitcher"):
-	if os.path.isfile(os.path.join("layerswitcher", fn)) and fn in ["layerswitcher.exe", "lwupdater.exe"]:
+	if os.path.isfile(os.path.join("layerswitcher", fn)) and fn in ["layerswitcher.exe", "lwupdater.exe", "assets.pack"]:
 		metadata["files"]["layerswitcher"][fn] = hashfile(open(os.path.join("layerswitcher", fn), "rb"))
 
 json.dump(metadata, f, indent = 4)
@@ -0,0 +1,54 @@
+class SpatialHash(object):
+
+	def __init__(self, cellSize):
+		self.cellSize = cellSize
+		self.cells = {}
+		self.spans = {}
+		self.layers = set()
+
+	def span(self, rect):
+		size = self.cellSize
+
+		return rect.left // size, rect.top // size, rect.right // size, rect.bottom // size
+
+	def move(self, obj, rect, layer):
+		span = (layer,) + self.span(rect)
+		old = self.spans.get(obj)
+
+		if span == old:
+			return
+
+		if old:
+			self.remove(obj)
+
+		layer, left, top, right, bottom = span
+
+		for x in xrange(left, right + 1):
+			for y in xrange(top, bottom + 1):
+				self.cells.setdefault((layer, x, y), set()).add(obj)
+
+		self.spans[obj] = span
+		self.layers.add(layer)
+
+	def remove(self, obj):
+		layer, left, top, right, bottom = self.spans.pop(obj)
+
+		for x in xrange(left, right + 1):
+			for y in xrange(top, bottom + 1):
+				cell = self.cells[(layer, x, y)]
+				cell.discard(obj)
+
+				if not cell:
+					del self.cells[(layer, x, y)]
+
+	def query(self, rect, layer = None):
+		left, top, right, bottom = self.span(rect)
+		found = set()
+
+		for cellLayer in (self.layers if layer is None else (layer,)):
+			for x in xrange(left, right + 1):
+				for y in xrange(top, bottom + 1):
+					if (cellLayer, x, y) in self.cells:
+						found |= self.cells[(cellLayer, x, y)]
+
+		return found
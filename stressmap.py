@@ -0,0 +1,255 @@
+#!/usr/bin/env python
+
+import argparse, array, base64, os, random, zlib
+
+from xml.sax.saxutils import quoteattr
+
+tileWidth = 70
+tileHeight = 35
+ground = 165
+decoration = 200
+
+#sheet tile id and properties for every kind of tile the mix can ask for
+kinds = {
+	"l": (122, {"l": ""}),
+	"r": (123, {"r": ""}),
+	"u": (26, {"u": ""}),
+	"d": (50, {"d": ""}),
+	"c": (402, {"c": ""}),
+	"w": (254, {"w": ""}),
+	"m": (256, {"m": ""}),
+	"k": (280, {"k": ""}),
+	"p": (153, {"p": "r", "r": "", "d": ""}),
+	"keyhole": (326, {"keyhole": "yellow", "l": "", "r": "", "u": ""})
+}
+
+defaultMix = "u=6,l=1,r=1,d=1,c=1,w=1,m=1,k=1,p=1,keyhole=1"
+enemyColors = ["yellow", "red", "blue"]
+keyColors = ["yellow", "green", "red", "blue"]
+
+def parseMix(text):
+	mix = []
+
+	for entry in text.split(","):
+		name, weight = entry.split("=")
+
+		if name not in kinds:
+			raise ValueError("unknown tile property %r" % name)
+
+		mix.append((name, float(weight)))
+
+	return mix
+
+class StressMap(object):
+
+	def __init__(self, width, height, layers, decor, enemies, items, texts, mix = defaultMix, density = 0.05, seed = 0):
+		#objects spawn from column 2 onwards, two rows above a ground that never rises past half the height
+		if width < 3:
+			raise ValueError("width must be at least 3 tiles")
+
+		if height < 4:
+			raise ValueError("height must be at least 4 tiles")
+
+		if layers < 1:
+			raise ValueError("a map needs at least one normal layer")
+
+		if min(decor, enemies, items, texts) < 0:
+			raise ValueError("layer and object counts cannot be negative")
+
+		if not 0 <= density <= 1:
+			raise ValueError("density must be between 0 and 1")
+
+		self.width = width
+		self.height = height
+		self.layers = layers
+		self.decor = decor
+		self.enemies = enemies
+		self.items = items
+		self.texts = texts
+		self.mix = parseMix(mix)
+		self.density = density
+		self.rng = random.Random(seed)
+
+		self.grounds = [self.heightmap() for i in xrange(self.layers)]
+
+	def heightmap(self):
+		rows = []
+		row = self.height * 3 // 4
+
+		for x in xrange(self.width):
+			if self.rng.random() < 0.2:
+				row = max(self.height // 2, min(self.height - 2, row + self.rng.choice((-1, 1))))
+
+			rows.append(row)
+
+		return rows
+
+	def pick(self):
+		total = sum(weight for name, weight in self.mix)
+		roll = self.rng.uniform(0, total)
+
+		for name, weight in self.mix:
+			roll -= weight
+			if roll <= 0:
+				break
+
+		return kinds[name][0] + 1
+
+	def normalLayer(self, index):
+		rows = self.grounds[index]
+		data = array.array("I", [0]) * (self.width * self.height)
+
+		for x in xrange(self.width):
+			for y in xrange(rows[x], self.height):
+				data[y * self.width + x] = ground + 1
+
+			for y in xrange(rows[x]):
+				if self.rng.random() < self.density:
+					data[y * self.width + x] = self.pick()
+
+		return data
+
+	def decorLayer(self):
+		data = array.array("I", [0]) * (self.width * self.height)
+
+		for i in xrange(len(data)):
+			if self.rng.random() < 0.2:
+				data[i] = decoration + 1
+
+		return data
+
+	def encode(self, data):
+		if data.itemsize != 4:
+			raise ValueError("gids must be 32 bit")
+
+		if array.array("I", [1]).tostring()[0] != "\x01":
+			data.byteswap()
+
+		return base64.b64encode(zlib.compress(data.tostring()))
+
+	def layer(self, name, data, decorations = None):
+		lines = [" <layer name=%s width=\"%d\" height=\"%d\">" % (quoteattr(name), self.width, self.height)]
+
+		if decorations is not None:
+			lines.append("  <properties>")
+			lines.append("   <property name=\"decorations\" value=%s/>" % quoteattr(decorations))
+			lines.append("  </properties>")
+
+		lines.append("  <data encoding=\"base64\" compression=\"zlib\">")
+		lines.append("   " + self.encode(data))
+		lines.append("  </data>")
+		lines.append(" </layer>")
+
+		return lines
+
+	def spot(self):
+		layer = self.rng.randrange(self.layers)
+		x = self.rng.randrange(2, self.width)
+
+		return x * tileWidth, (self.grounds[layer][x] - 2) * tileHeight, layer
+
+	def obj(self, name, x, y, width = tileWidth, **props):
+		lines = ["  <object name=%s x=\"%d\" y=\"%d\" width=\"%d\" height=\"%d\">" % (quoteattr(name), x, y, width, tileHeight)]
+		lines.append("   <properties>")
+
+		for key, value in sorted(props.items()):
+			lines.append("    <property name=%s value=%s/>" % (quoteattr(key), quoteattr(str(value))))
+
+		lines.append("   </properties>")
+		lines.append("  </object>")
+
+		return lines
+
+	def tileset(self):
+		lines = [" <tileset firstgid=\"1\" name=\"sheet\" tilewidth=\"%d\" tileheight=\"%d\">" % (tileWidth, tileHeight)]
+		lines.append("  <image source=\"../../../assets/sprites/sheet.png\" width=\"1680\" height=\"840\"/>")
+
+		for tileID, props in sorted(set((kinds[name][0], tuple(sorted(kinds[name][1].items()))) for name, weight in self.mix)):
+			lines.append("  <tile id=\"%d\">" % tileID)
+			lines.append("   <properties>")
+
+			for key, value in props:
+				lines.append("    <property name=%s value=%s/>" % (quoteattr(key), quoteattr(value)))
+
+			lines.append("   </properties>")
+			lines.append("  </tile>")
+
+		lines.append("  <tile id=\"%d\">" % ground)
+		lines.append("   <properties>")
+
+		for key in "dlru":
+			lines.append("    <property name=\"%s\" value=\"\"/>" % key)
+
+		lines.append("   </properties>")
+		lines.append("  </tile>")
+		lines.append(" </tileset>")
+
+		return lines
+
+	def generate(self):
+		lines = ["<?xml version=\"1.0\" encoding=\"UTF-8\"?>"]
+		lines.append("<map version=\"1.0\" orientation=\"orthogonal\" width=\"%d\" height=\"%d\" tilewidth=\"%d\" tileheight=\"%d\">" % (self.width, self.height, tileWidth, tileHeight))
+		lines.append(" <properties>")
+		lines.append("  <property name=\"bg\" value=\"d:world1\"/>")
+		lines.append(" </properties>")
+		lines += self.tileset()
+
+		for index in xrange(self.layers):
+			lines += self.layer("layer%d" % index, self.normalLayer(index))
+
+			for decor in xrange(index, self.decor, self.layers):
+				lines += self.layer("decor%d" % decor, self.decorLayer(), str(index))
+
+		lines.append(" <objectgroup name=\"objects\" width=\"%d\" height=\"%d\">" % (self.width, self.height))
+		lines += self.obj("spawn", tileWidth, (self.grounds[0][1] - 2) * tileHeight, layer = 0)
+
+		for i in xrange(self.enemies):
+			x, y, layer = self.spot()
+			lines += self.obj("enemy", x, y, color = self.rng.choice(enemyColors), layer = layer)
+
+		for i in xrange(self.items):
+			x, y, layer = self.spot()
+			lines += self.obj("item", x, y, color = self.rng.choice(keyColors), layer = layer)
+
+		for i in xrange(self.texts):
+			x, y, layer = self.spot()
+			lines += self.obj("text", x, y - 2 * tileHeight, 4 * tileWidth, text = "stress text %d" % i, layer = layer)
+
+		lines.append(" </objectgroup>")
+		lines.append("</map>")
+
+		return "\n".join(lines) + "\n"
+
+	def write(self, path):
+		directory = os.path.dirname(path)
+
+		if directory and not os.path.isdir(directory):
+			os.makedirs(directory)
+
+		with open(path, "w") as f:
+			f.write(self.generate())
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description = "Write a large synthetic map for scaling tests.")
+	parser.add_argument("-n", "--name", default = "Stress", help = "map folder name under maps/Game")
+	parser.add_argument("-W", "--width", type = int, default = 1000)
+	parser.add_argument("-H", "--height", type = int, default = 60)
+	parser.add_argument("-l", "--layers", type = int, default = 3, help = "normal layers")
+	parser.add_argument("-d", "--decor", type = int, default = 3, help = "decoration layers")
+	parser.add_argument("-e", "--enemies", type = int, default = 100)
+	parser.add_argument("-i", "--items", type = int, default = 20)
+	parser.add_argument("-t", "--texts", type = int, default = 10)
+	parser.add_argument("-m", "--mix", default = defaultMix, help = "tile property weights, e.g. %s" % defaultMix)
+	parser.add_argument("--density", type = float, default = 0.05, help = "chance of a property tile in each open cell")
+	parser.add_argument("--seed", type = int, default = 0)
+	args = parser.parse_args()
+
+	try:
+		stress = StressMap(args.width, args.height, args.layers, args.decor, args.enemies, args.items, args.texts, args.mix, args.density, args.seed)
+	except ValueError as e:
+		parser.error(str(e))
+
+	path = "maps/Game/%s/map.tmx" % args.name
+	stress.write(path)
+
+	print "wrote %s (%dx%d, %d layers, %d decorations)" % (path, args.width, args.height, args.layers, args.decor)
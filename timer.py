@@ -20,9 +20,12 @@ class Timer(object):
 
 		self.render(game)
 
-	def updateAndDraw(self, game):
+	def update(self, game):
 		if not game.finished:
 			self.current += game.dt * 0.001
+
+	def draw(self, game):
+		if not game.finished:
 			self.render(game)
 
 		game.screen.blit(self.rendered, (10, 5))
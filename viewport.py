@@ -1,4 +1,4 @@
-import pygame, utils, particles, enemy, item
+import pygame, utils
 
 from vector import Vec2d as Vector
 util = utils.Utils()
@@ -7,6 +7,7 @@ class Viewport(object):
 
 	def __init__(self, game, x, y):
 		self.position = Vector(x, y)
+		self.lastPosition = Vector(x, y)
 		self.resolution = Vector(game.resolution)
 		self.halfResolution = Vector(game.halfResolution)
 		self.rect = pygame.rect.Rect(self.position - self.halfResolution, self.resolution)
@@ -36,26 +37,35 @@ class Viewport(object):
 			self.rect.bottom = game.map.height
 			self.position.y = self.rect.y + self.halfResolution.y
 
-		game.player.rect.x = game.player.position.x - self.rect.x
-		game.player.rect.y = game.player.position.y - self.rect.y
+		self.place(game)
+
+	def interpolate(self, game, alpha):
+		position = self.lastPosition + (self.position - self.lastPosition) * alpha
+		self.rect = pygame.rect.Rect(position - self.halfResolution, self.resolution)
+
+		self.place(game)
+
+	def place(self, game):
+		game.player.rect.topleft = self.toScreen(game.player.interpolate(game.alpha))
 
 		game.player.cdBar = pygame.rect.Rect(
 			(game.player.rect.left, game.player.rect.bottom + 2),
 			(util.remap(game.player.layerCooldown, 0, 0.5, 0, game.player.rect.width), 5)
 		)
 
-		for gItem in item.Item.group:
-			gItem.rect.x = gItem.position.x - self.rect.x
-			gItem.rect.y = gItem.position.y - self.rect.y
-
-		for gEnemy in enemy.Enemy.group:
-			gEnemy.rect.x = gEnemy.position.x - self.rect.x
-			gEnemy.rect.y = gEnemy.position.y - self.rect.y
-
-		for group in particles.Particles.groups:
-			group.setOffset(self.rect.topleft)
-
 		if game.map.background:
 			bgx = -util.remap(self.rect.x, 0, game.map.width - self.resolution.x, 0, game.map.bgSize[0] - self.resolution.x)
 			bgy = -util.remap(self.rect.y, 0, game.map.height - self.resolution.y, 0, game.map.bgSize[1] - self.resolution.y)
 			game.map.bgOffset = (bgx, bgy)
+
+	def visibleArea(self, game):
+		return self.rect.inflate(2 * game.map.tilemap.tilewidth, 0)
+
+	def shadowArea(self, game):
+		#shadows fall below their character, so the columns above the view may hold characters whose shadow still shows
+		area = self.visibleArea(game)
+
+		return pygame.rect.Rect(area.left, 0, area.width, area.top)
+
+	def toScreen(self, position):
+		return position[0] - self.rect.x, position[1] - self.rect.y